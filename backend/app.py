@@ -2,18 +2,55 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta, time
+import hashlib
+import math
 import os
+import sys
 import sqlite3
 import pandas as pd
-import hashlib
 import secrets
 from functools import wraps
+from itertools import chain
 from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+# Make sibling modules importable whether the app is loaded as ``app``
+# (from backend/) or as ``backend.app`` (gunicorn from the repo root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import serializers
+from serializers import FastJSONProvider
+from http_cache import conditional
+from response_cache import ResponseCache
+from compression import init_compression
+from query_stats import init_query_stats
+from metrics import init_metrics
+from db_routing import ReplicaRouter, RoutingSession
+from catalog import ServiceCatalog
+from salon_index import SalonIndex
+from profiling import init_profiling
+from tokens import CurrentUser, TokenSigner, TokenVersionCache
+from rate_limit import RateLimiter
+from passwords import DUMMY_HASH, PasswordHasherBusy, hash_password, needs_rehash, verify_password
+import schedule
+from schedule import ScheduleCache
+import exports
+from jobs import JobQueue
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+
+# Behind PROXY_HOPS reverse proxies (1 on Render) take the client address
+# from the X-Forwarded-For entry the nearest trusted proxy appended, not the
+# leftmost one which the client controls
+proxy_hops = int(os.getenv('PROXY_HOPS', '0'))
+if proxy_hops:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops)
 
 # CORS configuration
 cors_origins = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:5174,http://localhost:3000,http://100.88.126.87:5173,http://100.88.126.87:5174,http://100.70.247.59:5173,http://100.70.247.59:5174').split(',')
@@ -32,22 +69,80 @@ else:
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+# Optional read replicas (DATABASE_READ_URL) for the public read endpoints
+replicas = ReplicaRouter.from_env()
+replicas.init_app(app, db.session)
+
+# Per-request SQL statement counts, DB time and query budget warnings
+init_query_stats(app)
+
+# Cache for anonymous salon listing/detail responses
+response_cache = ResponseCache.from_env()
+
+# gzip/brotli for large JSON payloads, cached responses keep their variants
+init_compression(app, response_cache)
+
+# Request/DB/cache metrics exposed at /metrics
+metrics = init_metrics(
+    app,
+    engines=lambda: {'primary': db.engine, **replicas.named_engines()},
+    # Caches created further down, looked up when /metrics is scraped
+    caches={
+        'response': response_cache.stats,
+        'catalog': lambda: service_catalog.stats(),
+        'salon_index': lambda: salon_index.stats(),
+        'schedules': lambda: salon_schedules.stats(),
+        'token_versions': lambda: token_versions.stats(),
+    }
+)
+
+# Token-bucket limits for login, register, booking and review writes
+rate_limiter = RateLimiter.from_env()
 
 # Authentication helpers
-def hash_password(password):
-    """Hash a password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}:{password_hash}"
-
-def verify_password(password, stored_hash):
-    """Verify a password against its hash"""
-    try:
-        salt, password_hash = stored_hash.split(':')
-        return hashlib.sha256((password + salt).encode()).hexdigest() == password_hash
-    except:
-        return False
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    response = jsonify({'error': 'Too many login attempts in progress, please retry'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+# Signed access tokens, revoked by bumping users.token_version
+token_signer = TokenSigner(app.config['SECRET_KEY'])
+# Opaque tokens stored in users.auth_token keep working during the transition
+ACCEPT_LEGACY_TOKENS = os.getenv('ACCEPT_LEGACY_TOKENS', 'true').lower() == 'true'
+
+def load_token_version(user_id):
+    """Current token version of an active user, None if inactive or missing"""
+    row = db.session.query(User.token_version, User.is_active).filter_by(id=user_id).first()
+    if row is None or not row.is_active:
+        return None
+    return row.token_version or 0
+
+token_versions = TokenVersionCache(load_token_version)
+
+def issue_token(user):
+    return token_signer.issue(user.id, user.is_admin, user.token_version)
+
+def revoke_tokens(user):
+    """Invalidate every token issued to ``user`` so far"""
+    user.token_version = (user.token_version or 0) + 1
+    user.auth_token = secrets.token_hex(32)
+    db.session.commit()
+    token_versions.forget(user.id)
+
+def authenticate(token):
+    """Return the user a bearer token belongs to, or None"""
+    claims = token_signer.verify(token)
+    if claims is not None:
+        user_id, is_admin, version = claims
+        if not token_versions.check(user_id, version):
+            return None
+        return CurrentUser(user_id, is_admin, lambda user_id: db.session.get(User, user_id))
+    if ACCEPT_LEGACY_TOKENS:
+        return User.query.filter_by(auth_token=token, is_active=True).first()
+    return None
 
 def require_auth(f):
     """Decorator to require authentication"""
@@ -57,8 +152,7 @@ def require_auth(f):
         if not auth_header or not auth_header.startswith('Bearer '):
             return jsonify({'error': 'Authentication required'}), 401
         
-        token = auth_header.split(' ')[1]
-        user = User.query.filter_by(auth_token=token, is_active=True).first()
+        user = authenticate(auth_header.split(' ')[1])
         if not user:
             return jsonify({'error': 'Invalid token'}), 401
         
@@ -74,8 +168,7 @@ def require_admin(f):
         if not auth_header or not auth_header.startswith('Bearer '):
             return jsonify({'error': 'Authentication required'}), 401
         
-        token = auth_header.split(' ')[1]
-        user = User.query.filter_by(auth_token=token, is_active=True).first()
+        user = authenticate(auth_header.split(' ')[1])
         if not user:
             return jsonify({'error': 'Invalid token'}), 401
         
@@ -86,6 +179,17 @@ def require_admin(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def is_admin_request():
+    """Whether the current request carries a valid admin token"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return False
+    user = authenticate(auth_header.split(' ')[1])
+    return user is not None and user.is_admin
+
+# cProfile for admin requests sending X-Profile and 1-in-N sampled requests
+profiler = init_profiling(app, is_admin_request)
+
 def create_default_time_slots(salon_id):
     """Create default time slots for a salon"""
     time_slots = []
@@ -138,17 +242,33 @@ class Salon(db.Model):
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped whenever the salon or its services, images, reviews or hours change
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     booking_enabled = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
     is_bio_diamond = db.Column(db.Boolean, default=False)
     about = db.Column(db.Text)
+    # Review summary maintained by the flush hook below, used to sort listings
+    rating_avg = db.Column(db.Float, default=0)
+    review_count = db.Column(db.Integer, default=0)
+    # Holidays of this calendar (see Holiday) close the salon
+    holiday_calendar = db.Column(db.String(20))
+    
+    # Listing sort keys, each ending with the primary key for stable pages
+    __table_args__ = (
+        db.Index('ix_salons_rating', 'rating_avg', 'review_count', 'id'),
+        db.Index('ix_salons_review_count', 'review_count', 'rating_avg', 'id'),
+        db.Index('ix_salons_nome', 'nome', 'id'),
+        db.Index('ix_salons_location', 'latitude', 'longitude'),
+    )
     
     # Relationships
     owner = db.relationship('User', back_populates='salons')
     services = db.relationship('SalonService', back_populates='salon', lazy='dynamic')
     bookings = db.relationship('Booking', back_populates='salon', lazy='dynamic')
     time_slots = db.relationship('TimeSlot', back_populates='salon', lazy='dynamic')
+    schedule_exceptions = db.relationship('ScheduleException', back_populates='salon', lazy='dynamic')
     reviews = db.relationship('Review', back_populates='salon', lazy='dynamic')
     images = db.relationship('SalonImage', back_populates='salon', lazy='dynamic', cascade='all, delete-orphan')
 
@@ -174,6 +294,7 @@ class Service(db.Model):
     category = db.Column(db.String(50))
     description = db.Column(db.Text)
     is_bio_diamond = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     salon_services = db.relationship('SalonService', back_populates='service', lazy='dynamic')
@@ -187,6 +308,14 @@ class SalonService(db.Model):
     price = db.Column(db.Float)
     duration = db.Column(db.Integer)  # minutes
     
+    # Semi-joins from salons probe (salon_id, service_id) and check price and
+    # duration from the index alone; searches driven by a service scan use
+    # (service_id, price)
+    __table_args__ = (
+        db.Index('ix_salon_services_salon_service', 'salon_id', 'service_id', 'price', 'duration'),
+        db.Index('ix_salon_services_service_price', 'service_id', 'price'),
+    )
+    
     # Relationships
     salon = db.relationship('Salon', back_populates='services')
     service = db.relationship('Service', back_populates='salon_services')
@@ -201,9 +330,47 @@ class TimeSlot(db.Model):
     end_time = db.Column(db.Time)
     is_available = db.Column(db.Boolean, default=True)
     
+    __table_args__ = (
+        db.Index('ix_time_slots_salon_day', 'salon_id', 'day_of_week'),
+    )
+    
     # Relationships
     salon = db.relationship('Salon', back_populates='time_slots')
 
+class ScheduleException(db.Model):
+    """A dated change to a salon's weekly hours: closed all day without
+    start_time/end_time, otherwise one window of reduced hours"""
+    __tablename__ = 'schedule_exceptions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    salon_id = db.Column(db.Integer, db.ForeignKey('salons.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time)
+    end_time = db.Column(db.Time)
+    note = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_schedule_exceptions_salon_date', 'salon_id', 'date'),
+    )
+    
+    # Relationships
+    salon = db.relationship('Salon', back_populates='schedule_exceptions')
+
+class Holiday(db.Model):
+    """A public holiday of a calendar (e.g. 'PT'), shared by every salon
+    using that calendar"""
+    __tablename__ = 'holidays'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    calendar = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    name = db.Column(db.String(100))
+    
+    __table_args__ = (
+        db.UniqueConstraint('calendar', 'date', name='uq_holidays_calendar_date'),
+    )
+
 class Booking(db.Model):
     __tablename__ = 'bookings'
     
@@ -219,6 +386,11 @@ class Booking(db.Model):
     status = db.Column(db.String(20), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Availability reads a salon's bookings of one date
+    __table_args__ = (
+        db.Index('ix_bookings_salon_date', 'salon_id', 'booking_date', 'booking_time'),
+    )
+    
     # Relationships
     salon = db.relationship('Salon', back_populates='bookings')
     service = db.relationship('Service')
@@ -232,6 +404,7 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     customer_id = db.Column(db.String(50), nullable=True)
     auth_token = db.Column(db.String(200), unique=True)
+    token_version = db.Column(db.Integer, default=0, nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -253,7 +426,7 @@ class Review(db.Model):
     __tablename__ = 'reviews'
     
     id = db.Column(db.Integer, primary_key=True)
-    salon_id = db.Column(db.Integer, db.ForeignKey('salons.id'), nullable=False)
+    salon_id = db.Column(db.Integer, db.ForeignKey('salons.id'), nullable=False, index=True)
     customer_name = db.Column(db.String(100), nullable=False)
     customer_email = db.Column(db.String(100), nullable=False)
     rating = db.Column(db.Integer, nullable=False)  # 1-5 stars
@@ -265,8 +438,357 @@ class Review(db.Model):
     # Relationships
     salon = db.relationship('Salon', back_populates='reviews')
 
+class Job(db.Model):
+    """A unit of background work, run by backend/worker.py (see jobs.py)"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON)
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    idempotency_key = db.Column(db.String(200), unique=True)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    # Workers claim the oldest due job
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at', 'id'),
+    )
+
+# Salon versioning
+# Rows of these models belong to a salon and change what its public endpoints return
+SALON_CHILD_MODELS = (SalonService, SalonImage, Review, TimeSlot, ScheduleException)
+
+def mark_salons_changed(salon_ids, session=None):
+    """Remember salons written in the current transaction so their cached
+    responses are dropped once it commits"""
+    session = session or db.session
+    session.info.setdefault('changed_salons', set()).update(salon_ids)
+
+def touch_salons(salon_ids, session=None):
+    """Bump updated_at for the given salons.
+
+    Needed after bulk query.update()/delete() calls, which bypass the
+    flush hook below.
+    """
+    salon_ids = list(salon_ids)
+    if not salon_ids:
+        return
+    session = session or db.session
+    statement = Salon.__table__.update().where(
+        Salon.__table__.c.id.in_(salon_ids)
+    ).values(updated_at=datetime.utcnow())
+    session.connection().execute(statement)
+    mark_salons_changed(salon_ids, session)
+
+def refresh_review_summaries(salon_ids=None, session=None):
+    """Recompute rating_avg and review_count from the reviews table, for
+    the given salons or every salon when ``salon_ids`` is None"""
+    session = session or db.session
+    salons = Salon.__table__
+    reviews = Review.__table__
+    of_salon = reviews.c.salon_id == salons.c.id
+    statement = salons.update().values(
+        rating_avg=db.select(db.func.coalesce(db.func.avg(reviews.c.rating), 0)).where(of_salon).scalar_subquery(),
+        review_count=db.select(db.func.count(reviews.c.id)).where(of_salon).scalar_subquery()
+    )
+    if salon_ids is not None:
+        salon_ids = list(salon_ids)
+        if not salon_ids:
+            return
+        statement = statement.where(salons.c.id.in_(salon_ids))
+    session.connection().execute(statement)
+
+@event.listens_for(db.session, 'after_flush')
+def touch_salons_on_child_changes(session, flush_context):
+    """Keep Salon.updated_at current when services, images, reviews,
+    opening hours or schedule exceptions of a salon are written, and its
+    review summary when reviews are"""
+    changed = list(chain(session.new, session.dirty, session.deleted))
+    salon_ids = {
+        obj.salon_id for obj in changed
+        if isinstance(obj, SALON_CHILD_MODELS) and obj.salon_id is not None
+    }
+    if salon_ids:
+        touch_salons(salon_ids, session)
+    refresh_review_summaries({obj.salon_id for obj in changed if isinstance(obj, Review)}, session)
+    mark_salons_changed((obj.id for obj in changed if isinstance(obj, Salon)), session)
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_changed_salons(session):
+    salon_ids = session.info.pop('changed_salons', None)
+    if salon_ids:
+        response_cache.invalidate(['salons'] + [f'salon:{salon_id}' for salon_id in salon_ids])
+        salon_index.invalidate()
+        salon_schedules.invalidate(salon_ids)
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_changed_salons(session):
+    session.info.pop('changed_salons', None)
+
+# Services catalog snapshot, joined in memory instead of in SQL
+service_catalog = ServiceCatalog(
+    load_rows=lambda: db.session.query(*serializers.service.columns(Service)).order_by(Service.id).all(),
+    load_version=lambda: tuple(db.session.query(db.func.max(Service.updated_at), db.func.count(Service.id)).one())
+)
+
+@event.listens_for(db.session, 'after_commit')
+def refresh_changed_catalog(session):
+    if session.info.pop('catalog_changed', False):
+        service_catalog.invalidate()
+
+@event.listens_for(db.session, 'after_flush')
+def mark_catalog_changed(session, flush_context):
+    if any(isinstance(obj, Service) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info['catalog_changed'] = True
+
+def service_ids_for(service_ids=(), category=None):
+    """Catalog ids of the requested services plus the services of a
+    category, None when neither is given"""
+    if not service_ids and not category:
+        return None
+    service_ids = set(service_ids)
+    return frozenset(
+        row[0] for row in service_catalog.get().rows
+        if row[0] in service_ids or (category and (row[2] or '').lower() == category.lower())
+    )
+
+def salon_offers_exist(service_ids=None, max_price=None, max_duration=None):
+    """EXISTS clause for salons with one salon_services row matching all
+    the given conditions"""
+    offers = db.session.query(SalonService.id).filter(SalonService.salon_id == Salon.id)
+    if service_ids is not None:
+        offers = offers.filter(SalonService.service_id.in_(sorted(service_ids)))
+    if max_price is not None:
+        offers = offers.filter(SalonService.price <= max_price)
+    if max_duration is not None:
+        offers = offers.filter(SalonService.duration <= max_duration)
+    return offers.exists()
+
+def salon_version(salon_id):
+    """Cheap version lookup for a single salon's public resources"""
+    updated_at = db.session.query(Salon.updated_at).filter(Salon.id == salon_id).scalar()
+    if updated_at is None:
+        return None
+    # Salon responses embed catalog names and descriptions
+    return updated_at, service_catalog.version
+
+def salons_listing_version():
+    """Cheap version lookup covering every salon in the listing, and the
+    catalog that category= filters resolve through"""
+    return tuple(db.session.query(db.func.max(Salon.updated_at), db.func.count(Salon.id)).one()) + (
+        service_catalog.version,)
+
+# Facet index over salons, patched from rows whose updated_at moved
+SALON_INDEX_COLUMNS = (
+    Salon.id, Salon.nome, Salon.cidade, Salon.regiao, Salon.estado,
+    Salon.is_bio_diamond, Salon.booking_enabled, Salon.updated_at
+)
+
+def load_index_salons(since):
+    query = db.session.query(*SALON_INDEX_COLUMNS)
+    if since is not None:
+        query = query.filter(Salon.updated_at >= since)
+    return query.all()
+
+def load_index_offers(salon_ids):
+    query = db.session.query(SalonService.salon_id, SalonService.service_id, SalonService.price, SalonService.duration)
+    if salon_ids is not None:
+        query = query.filter(SalonService.salon_id.in_(salon_ids))
+    catalog = service_catalog.get().by_id
+    # Catalog rows follow serializers.service: id, name, category, ...
+    return [
+        (salon_id, service_id, catalog[service_id][2], price, duration)
+        for salon_id, service_id, price, duration in query.all() if service_id in catalog
+    ]
+
+salon_index = SalonIndex(
+    load_salons=load_index_salons,
+    load_offers=load_index_offers,
+    load_state=salons_listing_version
+)
+
+# Weekly opening hours per salon, versioned by Salon.updated_at
+def load_salon_schedule(salon_id):
+    rows = db.session.query(
+        Salon.updated_at, Salon.holiday_calendar, TimeSlot.day_of_week, TimeSlot.start_time, TimeSlot.end_time
+    ).outerjoin(
+        TimeSlot, db.and_(TimeSlot.salon_id == Salon.id, TimeSlot.is_available == True)
+    ).filter(Salon.id == salon_id).all()
+    if not rows:
+        return None
+    return rows[0][0], [row[2:] for row in rows if row[2] is not None], rows[0][1]
+
+salon_schedules = ScheduleCache(
+    load=load_salon_schedule,
+    load_version=lambda salon_id: db.session.query(Salon.updated_at).filter(Salon.id == salon_id).scalar()
+)
+
+EXCEPTION_COLUMNS = (ScheduleException.date, ScheduleException.start_time, ScheduleException.end_time)
+
+def load_date_overrides(salon_id, salon_schedule, start, end):
+    """Exceptions and holidays of one salon between two dates (inclusive),
+    one query per table whatever the length of the range"""
+    exceptions = db.session.query(*EXCEPTION_COLUMNS).filter(
+        ScheduleException.salon_id == salon_id,
+        ScheduleException.date.between(start, end)
+    ).all()
+    holidays = ()
+    if salon_schedule.holiday_calendar:
+        holidays = [day for (day,) in db.session.query(Holiday.date).filter(
+            Holiday.calendar == salon_schedule.holiday_calendar,
+            Holiday.date.between(start, end)
+        )]
+    return schedule.date_overrides(exceptions, holidays)
+
+def salon_service_duration(salon_id, service_id, default=60):
+    """Duration of a service at a salon, ``default`` when not offered"""
+    if service_id:
+        row = db.session.query(SalonService.duration).filter(
+            SalonService.salon_id == salon_id,
+            SalonService.service_id == service_id
+        ).first()
+        if row:
+            return row.duration
+    return default
+
+# Column lists selected for the shared serializers (see serializers.py)
+SALON_PUBLIC_COLUMNS = serializers.salon_public.columns(Salon)
+
+# Listing rows: the public columns followed by the review summary
+SALON_LISTING_COLUMNS = SALON_PUBLIC_COLUMNS + [Salon.rating_avg, Salon.review_count]
+
+# sort= options of the salon listing, backed by the Salon indexes; the id
+# tiebreak keeps pages from overlapping or skipping salons with equal keys
+SALON_SORTS = {
+    'name': (Salon.nome, Salon.id),
+    'rating': (Salon.rating_avg.desc(), Salon.review_count.desc(), Salon.id.desc()),
+    'reviews': (Salon.review_count.desc(), Salon.rating_avg.desc(), Salon.id.desc()),
+}
+
+KM_PER_DEGREE = 111.32
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+def squared_degrees_from(lat, lon):
+    """SQL expression ordering salons by distance from (lat, lon): squared
+    equirectangular distance in latitude degrees, exact enough for ranking
+    at city scale and computable by any database"""
+    scale = math.cos(math.radians(lat)) ** 2
+    delta_lat = Salon.latitude - lat
+    delta_lon = Salon.longitude - lon
+    return delta_lat * delta_lat + delta_lon * delta_lon * scale
+
+def within_radius(lat, lon, radius_km):
+    """Filters for salons within ``radius_km`` of (lat, lon), a bounding
+    box first so the location index narrows the scan"""
+    delta_lat = radius_km / KM_PER_DEGREE
+    delta_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return (
+        Salon.latitude.between(lat - delta_lat, lat + delta_lat),
+        Salon.longitude.between(lon - delta_lon, lon + delta_lon),
+        squared_degrees_from(lat, lon) <= delta_lat * delta_lat
+    )
+
+def review_summary(rating_avg, review_count):
+    return {
+        'average_rating': round(float(rating_avg or 0), 1) if review_count else 0,
+        'total_reviews': review_count or 0
+    }
+
+IMAGE_COLUMNS = serializers.image.columns(SalonImage)
+IMAGE_ORDER = (SalonImage.is_primary.desc(), SalonImage.display_order, SalonImage.id)
+
+# The service id is replaced by the catalog columns with service_catalog.join()
+SALON_SERVICE_COLUMNS = (SalonService.service_id, SalonService.price, SalonService.duration)
+
+MANAGED_SALON_SERVICE_COLUMNS = (SalonService.id,) + SALON_SERVICE_COLUMNS
+
+def get_images_for_salons(salon_ids):
+    """Load the images of several salons in one query, keyed by salon id"""
+    if not salon_ids:
+        return {}
+    rows = db.session.query(*IMAGE_COLUMNS).filter(
+        SalonImage.salon_id.in_(salon_ids)
+    ).order_by(SalonImage.salon_id, *IMAGE_ORDER).all()
+    return serializers.image.group_rows(rows, key_index=1)
+
+def get_images_for_salon(salon_id):
+    """Load the serialized images of one salon"""
+    rows = db.session.query(*IMAGE_COLUMNS).filter(
+        SalonImage.salon_id == salon_id
+    ).order_by(*IMAGE_ORDER).all()
+    return serializers.image.rows(rows)
+
+def get_services_for_salons(salon_ids):
+    """Load the managed services of several salons in one query, keyed by salon id"""
+    if not salon_ids:
+        return {}
+    rows = db.session.query(SalonService.salon_id, *MANAGED_SALON_SERVICE_COLUMNS).filter(
+        SalonService.salon_id.in_(salon_ids)
+    ).order_by(SalonService.salon_id, SalonService.id).all()
+    return serializers.managed_salon_service.group_rows(service_catalog.join(rows, 2), key_index=0, offset=1)
+
+# Background jobs, run by backend/worker.py
+jobs = JobQueue(db, Job)
+
+def salon_address(salon):
+    """Geocodable one-line address of a salon, empty without a street or city"""
+    if not salon.rua and not salon.cidade:
+        return ''
+    parts = (salon.rua, salon.porta, salon.cod_postal, salon.cidade, salon.pais or 'Portugal')
+    return ', '.join(part.strip() for part in parts if part and part.strip())
+
+def enqueue_geocoding(salon):
+    """Geocode the salon's address in the background, once per change.
+
+    The key includes the salon version being changed, so going back to an
+    earlier address geocodes it again; the job reads the address when it
+    runs, so out-of-order jobs still end on the current one.
+    """
+    address = salon_address(salon)
+    if address:
+        version = salon.updated_at.isoformat() if salon.updated_at else ''
+        digest = hashlib.sha1(f'{version}|{address.lower()}'.encode()).hexdigest()[:16]
+        jobs.enqueue('geocode_salon', {'salon_id': salon.id}, idempotency_key=f'geocode_salon:{salon.id}:{digest}')
+
+@jobs.task(max_attempts=3)
+def geocode_salon(salon_id):
+    """Fill in a salon's coordinates from its address"""
+    # Only the worker talks to the geocoder
+    from geocoding import geocode_address
+    salon = db.session.get(Salon, salon_id)
+    if salon is None:
+        return
+    address = salon_address(salon)
+    location = geocode_address(address) if address else None
+    if location:
+        salon.latitude, salon.longitude = location
+
+@jobs.task(name='refresh_review_summaries', every=int(os.getenv('REVIEW_SUMMARY_REFRESH_SECONDS', '86400')) or None)
+def refresh_review_summaries_job(salon_ids=None):
+    """Recompute review summaries, also picking up reviews written with
+    raw SQL, and bump the salons whose summary changed"""
+    query = db.session.query(Salon.id, Salon.rating_avg, Salon.review_count)
+    if salon_ids is not None:
+        query = query.filter(Salon.id.in_(salon_ids))
+    before = set(query.all())
+    refresh_review_summaries(salon_ids)
+    touch_salons({row[0] for row in set(query.all()) - before})
+
 # Authentication Routes
 @app.route('/api/auth/register', methods=['POST'])
+@rate_limiter.limit('register', ip='10/hour', email='5/hour', customer_id='5/hour')
 def register():
     data = request.get_json()
     
@@ -305,10 +827,11 @@ def register():
         'email': user.email,
         'name': user.name,
         'customer_id': user.customer_id,
-        'token': user.auth_token
+        'token': issue_token(user)
     }), 201
 
 @app.route('/api/auth/login', methods=['POST'])
+@rate_limiter.limit('login', ip='30/minute', email='10/minute')
 def login():
     data = request.get_json()
     
@@ -316,17 +839,41 @@ def login():
         return jsonify({'error': 'Email and password required'}), 400
     
     user = User.query.filter_by(email=data['email'], is_active=True).first()
-    if not user or not verify_password(data['password'], user.password_hash):
+    if not user:
+        # Same work as a real check so unknown emails are not faster
+        verify_password(data['password'], DUMMY_HASH)
+        return jsonify({'error': 'Invalid credentials'}), 401
+    if not verify_password(data['password'], user.password_hash):
         return jsonify({'error': 'Invalid credentials'}), 401
     
+    # Upgrade legacy SHA-256 hashes and hashes made with older cost settings
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(data['password'])
+        db.session.commit()
+    
     return jsonify({
         'id': user.id,
         'email': user.email,
         'name': user.name,
-        'token': user.auth_token,
+        'token': issue_token(user),
         'is_admin': user.is_admin
     })
 
+@app.route('/api/auth/logout', methods=['POST'])
+@require_auth
+def logout():
+    """Revoke all tokens of the current user"""
+    revoke_tokens(User.query.get_or_404(request.current_user.id))
+    return jsonify({'message': 'Logged out successfully'})
+
+@app.route('/api/auth/refresh', methods=['POST'])
+@require_auth
+def refresh_token():
+    """Rotate the token: revoke the current ones and issue a fresh token"""
+    user = User.query.get_or_404(request.current_user.id)
+    revoke_tokens(user)
+    return jsonify({'token': issue_token(user)})
+
 @app.route('/api/auth/me', methods=['GET'])
 @require_auth
 def get_current_user():
@@ -339,6 +886,9 @@ def get_current_user():
 
 # API Routes
 @app.route('/api/salons', methods=['GET'])
+@replicas.read_only
+@conditional(salons_listing_version)
+@response_cache.cached(lambda: ('salons',))
 def get_salons():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
@@ -346,8 +896,32 @@ def get_salons():
     regiao = request.args.get('regiao')
     search = request.args.get('search')
     bio_diamond_only = request.args.get('bio_diamond', 'false').lower() == 'true'
-    
-    query = Salon.query.filter(Salon.estado == 'Ativo')
+    # Repeated service_id values and the category's services are alternatives
+    service_ids = request.args.getlist('service_id', type=int)
+    offer_filters = {
+        'service_ids': service_ids_for(service_ids, request.args.get('category')),
+        'max_price': request.args.get('max_price', type=float),
+        'max_duration': request.args.get('max_duration', type=int)
+    }
+    sort = request.args.get('sort')
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    radius_km = request.args.get('radius_km', type=float)
+    
+    if sort is not None and sort != 'distance' and sort not in SALON_SORTS:
+        return jsonify({'error': f"Invalid sort, use one of: {', '.join(sorted(SALON_SORTS) + ['distance'])}"}), 400
+    has_origin = lat is not None and lon is not None
+    if (sort == 'distance' or radius_km is not None) and not has_origin:
+        return jsonify({'error': 'lat and lon are required to sort or filter by distance'}), 400
+    if has_origin and not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'error': 'Invalid lat/lon'}), 400
+    
+    # Select only the serialized columns, rows skip ORM instance construction
+    query = db.session.query(*SALON_LISTING_COLUMNS).filter(Salon.estado == 'Ativo')
+    
+    # Salons offering a service matching all the service filters
+    if any(value is not None for value in offer_filters.values()):
+        query = query.filter(salon_offers_exist(**offer_filters))
     
     # Filter for BIO Diamond certified salons only
     if bio_diamond_only:
@@ -360,154 +934,97 @@ def get_salons():
     if search:
         query = query.filter(Salon.nome.ilike(f'%{search}%'))
     
+    if radius_km is not None:
+        query = query.filter(*within_radius(lat, lon, radius_km))
+    
+    if sort == 'distance':
+        # Salons without coordinates go last
+        located = db.and_(Salon.latitude.isnot(None), Salon.longitude.isnot(None))
+        query = query.order_by(db.case((located, 0), else_=1), squared_degrees_from(lat, lon), Salon.id)
+    else:
+        query = query.order_by(*SALON_SORTS.get(sort, (Salon.id,)))
+    
     salons = query.paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    # Get all salon IDs for batch review query
-    salon_ids = [salon.id for salon in salons.items]
-    
-    # Get review summaries for all salons in one query
-    review_summaries = db.session.query(
-        Review.salon_id,
-        db.func.avg(Review.rating).label('avg_rating'),
-        db.func.count(Review.id).label('total_reviews')
-    ).filter(Review.salon_id.in_(salon_ids)).group_by(Review.salon_id).all()
-    
-    # Create a dictionary for quick lookup
-    review_dict = {summary.salon_id: {
-        'average_rating': round(float(summary.avg_rating or 0), 1),
-        'total_reviews': summary.total_reviews
-    } for summary in review_summaries}
+    # Get images for all salons in one query, sorted by primary first, then display_order
+    images_by_salon = get_images_for_salons([salon.id for salon in salons.items])
     
     salon_data = []
     for salon in salons.items:
-        reviews = review_dict.get(salon.id, {'average_rating': 0, 'total_reviews': 0})
-        
-        # Get salon images, sorted by primary first, then display_order
-        images = []
-        for image in salon.images.order_by(SalonImage.is_primary.desc(), SalonImage.display_order).all():
-            images.append({
-                'id': image.id,
-                'salon_id': image.salon_id,
-                'image_url': image.image_url,
-                'image_alt': image.image_alt,
-                'is_primary': image.is_primary,
-                'display_order': image.display_order,
-                'created_at': image.created_at.isoformat()
-            })
-        
-        salon_data.append({
-            'id': salon.id,
-            'nome': salon.nome,
-            'cidade': salon.cidade,
-            'regiao': salon.regiao,
-            'telefone': salon.telefone,
-            'email': salon.email,
-            'website': salon.website,
-            'rua': salon.rua,
-            'porta': salon.porta,
-            'cod_postal': salon.cod_postal,
-            'latitude': salon.latitude,
-            'longitude': salon.longitude,
-            'booking_enabled': salon.booking_enabled,
-            'is_bio_diamond': salon.is_bio_diamond,
-            'about': salon.about,
-            'images': images,
-            'reviews': reviews
-        })
-    
-    return jsonify({
+        # The serializer takes the leading public columns of the row
+        data = serializers.salon_public.row(salon)
+        data['images'] = images_by_salon.get(salon.id, [])
+        data['reviews'] = review_summary(salon.rating_avg, salon.review_count)
+        if has_origin and salon.latitude is not None and salon.longitude is not None:
+            data['distance_km'] = round(distance_km(lat, lon, salon.latitude, salon.longitude), 2)
+        salon_data.append(data)
+    
+    response = {
         'salons': salon_data,
         'total': salons.total,
         'pages': salons.pages,
         'current_page': page
-    })
+    }
+    # Counts per city, region, flag and service category for the filters
+    if request.args.get('facets', 'false').lower() == 'true':
+        response['facets'] = salon_index.facet_counts(
+            cidade=cidade, regiao=regiao, search=search, bio_diamond=bio_diamond_only, **offer_filters,
+            category=request.args.get('category'),
+            uncategorized_service_ids=service_ids_for(service_ids)
+        )
+    
+    return jsonify(response)
+
+@app.route('/api/salons/suggest', methods=['GET'])
+@replicas.read_only
+def suggest_salons():
+    """Type-ahead suggestions for salon names, cities and regions"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+    if not query:
+        return jsonify({'salons': [], 'cities': [], 'regions': []})
+    
+    return jsonify(salon_index.suggest(query, limit))
 
 @app.route('/api/salons/<int:salon_id>', methods=['GET'])
+@replicas.read_only
+@conditional(salon_version)
+@response_cache.cached(lambda salon_id: (f'salon:{salon_id}',))
 def get_salon(salon_id):
-    salon = Salon.query.get_or_404(salon_id)
+    salon = db.session.query(*SALON_LISTING_COLUMNS).filter(Salon.id == salon_id).first_or_404()
     
     # Get salon services
-    salon_services = db.session.query(SalonService, Service).join(Service).filter(
-        SalonService.salon_id == salon_id
-    ).all()
-    
-    services = [{
-        'id': service.id,
-        'name': service.name,
-        'category': service.category,
-        'description': service.description,
-        'is_bio_diamond': service.is_bio_diamond,
-        'price': salon_service.price,
-        'duration': salon_service.duration
-    } for salon_service, service in salon_services]
-    
-    # Get review summary using optimized query
-    review_summary = db.session.query(
-        db.func.avg(Review.rating).label('avg_rating'),
-        db.func.count(Review.id).label('total_reviews')
-    ).filter(Review.salon_id == salon_id).first()
-    
-    avg_rating = round(float(review_summary.avg_rating or 0), 1)
-    total_reviews = review_summary.total_reviews
+    services = serializers.salon_service.rows(service_catalog.join(
+        db.session.query(*SALON_SERVICE_COLUMNS).filter(
+            SalonService.salon_id == salon_id
+        ).all()
+    ))
     
+    data = serializers.salon_public.row(salon)
+    data['services'] = services
     # Get salon images, sorted by primary first, then display_order
-    images = []
-    for image in salon.images.order_by(SalonImage.is_primary.desc(), SalonImage.display_order).all():
-        images.append({
-            'id': image.id,
-            'salon_id': image.salon_id,
-            'image_url': image.image_url,
-            'image_alt': image.image_alt,
-            'is_primary': image.is_primary,
-            'display_order': image.display_order,
-            'created_at': image.created_at.isoformat()
-        })
+    data['images'] = get_images_for_salon(salon_id)
+    # Review summary kept on the salon row
+    data['reviews'] = review_summary(salon.rating_avg, salon.review_count)
     
-    return jsonify({
-        'id': salon.id,
-        'nome': salon.nome,
-        'cidade': salon.cidade,
-        'regiao': salon.regiao,
-        'telefone': salon.telefone,
-        'email': salon.email,
-        'website': salon.website,
-        'rua': salon.rua,
-        'porta': salon.porta,
-        'cod_postal': salon.cod_postal,
-        'latitude': salon.latitude,
-        'longitude': salon.longitude,
-        'booking_enabled': salon.booking_enabled,
-        'is_bio_diamond': salon.is_bio_diamond,
-        'about': salon.about,
-        'services': services,
-        'images': images,
-        'reviews': {
-            'average_rating': avg_rating,
-            'total_reviews': total_reviews
-        }
-    })
+    return jsonify(data)
 
 @app.route('/api/services', methods=['GET'])
+@replicas.read_only
+@conditional(lambda: service_catalog.version)
 def get_services():
     bio_diamond_only = request.args.get('bio_diamond', 'false').lower() == 'true'
     
-    query = Service.query
+    services = serializers.service.rows(service_catalog.get().rows)
     if bio_diamond_only:
-        query = query.filter(Service.is_bio_diamond == True)
-    
-    services = query.all()
+        services = [service for service in services if service['is_bio_diamond']]
     
-    return jsonify([{
-        'id': service.id,
-        'name': service.name,
-        'category': service.category,
-        'description': service.description,
-        'is_bio_diamond': service.is_bio_diamond
-    } for service in services])
+    return jsonify(services)
 
 @app.route('/api/salons/<int:salon_id>/availability', methods=['GET'])
+@replicas.read_only
 def get_availability(salon_id):
     date_str = request.args.get('date')
     service_id = request.args.get('service_id', type=int)
@@ -517,69 +1034,31 @@ def get_availability(salon_id):
     
     try:
         date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        day_of_week = date.weekday()  # 0=Monday, 6=Sunday
         
         # Get service duration if service_id is provided
-        duration = 60  # Default duration
-        if service_id:
-            salon_service = SalonService.query.filter(
-                SalonService.salon_id == salon_id,
-                SalonService.service_id == service_id
-            ).first()
-            if salon_service:
-                duration = salon_service.duration
+        duration = salon_service_duration(salon_id, service_id)
         
-        # Get time slots for this day
-        time_slots = TimeSlot.query.filter(
-            TimeSlot.salon_id == salon_id,
-            TimeSlot.day_of_week == day_of_week,
-            TimeSlot.is_available == True
-        ).all()
+        # Opening hours come from the cached weekly schedule, with the
+        # exceptions and holidays of this date
+        salon_schedule = salon_schedules.get(salon_id)
         
         # Get existing bookings for this date (both confirmed and pending)
-        existing_bookings = Booking.query.filter(
+        booked = schedule.booked_bits(booking_time for (booking_time,) in db.session.query(Booking.booking_time).filter(
             Booking.salon_id == salon_id,
             Booking.booking_date == date,
             Booking.status.in_(['confirmed', 'pending'])
-        ).all()
+        ))
         
-        # Generate all time slots with availability status
+        # Every 30-minute slot of the day, available when the service fits
+        # before closing and none of the slots it occupies is booked
         all_slots = []
-        for slot in time_slots:
-            current_time = datetime.combine(date, slot.start_time)
-            end_time = datetime.combine(date, slot.end_time)
-            
-            while current_time + timedelta(minutes=30) <= end_time:
-                slot_time = current_time.time()
-                slot_time_str = slot_time.strftime('%H:%M')
-                
-                # Check if this slot and all consecutive slots needed for the service duration are available
-                is_available = True
-                service_end_time = current_time + timedelta(minutes=duration)
-                
-                # Check if the service would end within salon hours
-                if service_end_time > end_time:
-                    is_available = False
-                else:
-                    # Check if any of the required consecutive slots are booked
-                    check_time = current_time
-                    while check_time < service_end_time:
-                        check_slot_time = check_time.time()
-                        is_slot_booked = any(
-                            booking.booking_time == check_slot_time 
-                            for booking in existing_bookings
-                        )
-                        if is_slot_booked:
-                            is_available = False
-                            break
-                        check_time += timedelta(minutes=30)
-                
-                all_slots.append({
-                    'time': slot_time_str,
-                    'available': is_available
-                })
-                
-                current_time += timedelta(minutes=30)
+        if salon_schedule is not None:
+            overrides = load_date_overrides(salon_id, salon_schedule, date, date)
+            free = schedule.free_starts(salon_schedule.starts_on(date, duration, overrides), booked, duration)
+            all_slots = [
+                {'time': schedule.format_minute(minute), 'available': bool(free >> minute & 1)}
+                for minute in schedule.minutes(salon_schedule.starts_on(date, schedule.SLOT_MINUTES, overrides))
+            ]
         
         return jsonify({
             'time_slots': all_slots,
@@ -590,7 +1069,166 @@ def get_availability(salon_id):
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
 
+AVAILABILITY_RANGE_MAX_DAYS = 62
+
+@app.route('/api/salons/<int:salon_id>/availability/range', methods=['GET'])
+@replicas.read_only
+def get_availability_range(salon_id):
+    """Available slots for every date from start_date to end_date, with
+    one query per table for the whole range"""
+    service_id = request.args.get('service_id', type=int)
+    try:
+        start = datetime.strptime(request.args.get('start_date', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date are required. Use YYYY-MM-DD'}), 400
+    if end < start or (end - start).days >= AVAILABILITY_RANGE_MAX_DAYS:
+        return jsonify({'error': f'The range must cover 1 to {AVAILABILITY_RANGE_MAX_DAYS} days'}), 400
+    
+    salon_schedule = salon_schedules.get(salon_id)
+    if salon_schedule is None:
+        return jsonify({'error': 'Salon not found'}), 404
+    duration = salon_service_duration(salon_id, service_id)
+    overrides = load_date_overrides(salon_id, salon_schedule, start, end)
+    
+    booked = {}
+    for booking_date, booking_time in db.session.query(Booking.booking_date, Booking.booking_time).filter(
+        Booking.salon_id == salon_id,
+        Booking.booking_date.between(start, end),
+        Booking.status.in_(['confirmed', 'pending'])
+    ):
+        booked[booking_date] = booked.get(booking_date, 0) | (1 << schedule.minute_of_day(booking_time))
+    
+    days = []
+    for offset in range((end - start).days + 1):
+        date = start + timedelta(days=offset)
+        free = schedule.free_starts(salon_schedule.starts_on(date, duration, overrides), booked.get(date, 0), duration)
+        days.append({
+            'date': date.isoformat(),
+            'is_open': bool(salon_schedule.windows_on(date, overrides)),
+            'available_slots': [schedule.format_minute(minute) for minute in schedule.minutes(free)]
+        })
+    
+    return jsonify({'days': days, 'service_duration': duration})
+
+@app.route('/api/availability/search', methods=['GET'])
+@replicas.read_only
+def search_availability():
+    """Salons with free slots on a date, in a city or around a point.
+    
+    Candidates, their opening hours, exceptions, the holidays of the date
+    and the bookings are loaded with one query each and free slots are
+    computed as bitmaps (see schedule.py).
+    Slots start at or after time_from and end by time_to.
+    """
+    date_str = request.args.get('date')
+    service_id = request.args.get('service_id', type=int)
+    cidade = request.args.get('cidade')
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    radius_km = request.args.get('radius_km', 10, type=float)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    
+    if not date_str:
+        return jsonify({'error': 'Date parameter required'}), 400
+    has_origin = lat is not None and lon is not None
+    if not cidade and not has_origin:
+        return jsonify({'error': 'cidade or lat and lon are required'}), 400
+    if has_origin and not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'error': 'Invalid lat/lon'}), 400
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    try:
+        earliest = schedule.parse_minute(request.args.get('time_from', '00:00'))
+        latest = schedule.parse_minute(request.args.get('time_to', '23:59'))
+    except ValueError:
+        return jsonify({'error': 'Invalid time format. Use HH:MM'}), 400
+    
+    # Bookable salons, with the duration of the requested service
+    if service_id:
+        query = db.session.query(
+            Salon.id, Salon.nome, Salon.cidade, Salon.latitude, Salon.longitude, Salon.holiday_calendar,
+            SalonService.duration
+        ).join(SalonService, db.and_(SalonService.salon_id == Salon.id, SalonService.service_id == service_id))
+    else:
+        query = db.session.query(
+            Salon.id, Salon.nome, Salon.cidade, Salon.latitude, Salon.longitude, Salon.holiday_calendar,
+            db.literal(None)
+        )
+    query = query.filter(Salon.estado == 'Ativo', Salon.booking_enabled == True, Salon.is_active == True)
+    if cidade:
+        query = query.filter(Salon.cidade.ilike(f'%{cidade}%'))
+    if has_origin:
+        query = query.filter(*within_radius(lat, lon, radius_km))
+        query = query.order_by(squared_degrees_from(lat, lon), Salon.id)
+    else:
+        query = query.order_by(*SALON_SORTS['rating'])
+    candidates = query.all()
+    candidate_ids = query.with_entities(Salon.id).order_by(None)
+    
+    hours = {}
+    for salon_id, day, start_time, end_time in db.session.query(
+        TimeSlot.salon_id, TimeSlot.day_of_week, TimeSlot.start_time, TimeSlot.end_time
+    ).filter(
+        TimeSlot.salon_id.in_(candidate_ids),
+        TimeSlot.day_of_week == date.weekday(),
+        TimeSlot.is_available == True
+    ):
+        hours.setdefault(salon_id, []).append((day, start_time, end_time))
+    
+    exceptions = {}
+    for salon_id, *row in db.session.query(ScheduleException.salon_id, *EXCEPTION_COLUMNS).filter(
+        ScheduleException.salon_id.in_(candidate_ids),
+        ScheduleException.date == date
+    ):
+        exceptions.setdefault(salon_id, []).append(row)
+    closed_calendars = {calendar for (calendar,) in db.session.query(Holiday.calendar).filter(Holiday.date == date)}
+    
+    booked = {}
+    for salon_id, booking_time in db.session.query(Booking.salon_id, Booking.booking_time).filter(
+        Booking.salon_id.in_(candidate_ids),
+        Booking.booking_date == date,
+        Booking.status.in_(['confirmed', 'pending'])
+    ):
+        booked[salon_id] = booked.get(salon_id, 0) | (1 << schedule.minute_of_day(booking_time))
+    
+    results = []
+    for salon_id, nome, salon_cidade, salon_lat, salon_lon, calendar, duration in candidates:
+        if salon_id not in hours and salon_id not in exceptions:
+            continue
+        duration = duration or 60
+        overrides = schedule.date_overrides(
+            exceptions.get(salon_id, ()), (date,) if calendar in closed_calendars else ()
+        )
+        starts = schedule.WeeklySchedule(None, hours.get(salon_id, ())).starts_on(date, duration, overrides)
+        starts &= schedule.range_bits(earliest, latest - duration + 1)
+        free = schedule.free_starts(starts, booked.get(salon_id, 0), duration)
+        if not free:
+            continue
+        data = {
+            'id': salon_id,
+            'nome': nome,
+            'cidade': salon_cidade,
+            'service_duration': duration,
+            'available_slots': [schedule.format_minute(minute) for minute in schedule.minutes(free)]
+        }
+        if has_origin and salon_lat is not None and salon_lon is not None:
+            data['distance_km'] = round(distance_km(lat, lon, salon_lat, salon_lon), 2)
+        results.append(data)
+        if len(results) >= limit:
+            break
+    
+    return jsonify({
+        'date': date_str,
+        'service_id': service_id,
+        'salons': results,
+        'candidates': len(candidates)
+    })
+
 @app.route('/api/bookings', methods=['POST'])
+@rate_limiter.limit('booking', ip='30/minute', customer_email='10/hour')
 def create_booking():
     data = request.get_json()
     
@@ -614,7 +1252,6 @@ def create_booking():
             return jsonify({'error': 'Booking is not available for this salon'}), 400
         
         # Get service duration first
-        service = Service.query.get(data['service_id'])
         salon_service = SalonService.query.filter(
             SalonService.salon_id == data['salon_id'],
             SalonService.service_id == data['service_id']
@@ -626,47 +1263,46 @@ def create_booking():
         booking_start = datetime.combine(booking_date, booking_time)
         booking_end = booking_start + timedelta(minutes=duration)
         
-        # Get salon's operating hours for this day
-        day_of_week = booking_date.weekday()
-        salon_time_slot = TimeSlot.query.filter(
-            TimeSlot.salon_id == data['salon_id'],
-            TimeSlot.day_of_week == day_of_week,
-            TimeSlot.is_available == True
-        ).first()
+        # Get salon's operating hours for this day, the salon row we hold
+        # versions the cached schedule so this check is never stale
+        salon_schedule = salon_schedules.get(salon.id, salon.updated_at)
+        windows = salon_schedule.windows_on(
+            booking_date, load_date_overrides(salon.id, salon_schedule, booking_date, booking_date)
+        )
         
-        if not salon_time_slot:
+        if not windows:
             return jsonify({'error': 'Salon is closed on this day'}), 400
         
-        salon_open = datetime.combine(booking_date, salon_time_slot.start_time)
-        salon_close = datetime.combine(booking_date, salon_time_slot.end_time)
+        start_minute = schedule.minute_of_day(booking_time)
+        window = schedule.window_at(windows, start_minute)
+        if window is None:
+            return jsonify({'error': 'Salon is closed at this time'}), 400
         
         # Check if the service would end within salon hours
-        if booking_end > salon_close:
+        if start_minute + duration > window[1]:
             return jsonify({'error': 'Service duration exceeds salon closing time'}), 400
         
-        # Check for conflicts across all required time slots
+        # Check for conflicts across all required time slots at once
+        slot_times = []
         check_time = booking_start
         while check_time < booking_end:
-            check_slot_time = check_time.time()
-            existing_booking = Booking.query.filter(
-                Booking.salon_id == data['salon_id'],
-                Booking.booking_date == booking_date,
-                Booking.booking_time == check_slot_time,
-                Booking.status.in_(['confirmed', 'pending'])
-            ).first()
-            
-            if existing_booking:
-                return jsonify({'error': 'Time slot already booked'}), 400
-            
+            slot_times.append(check_time.time())
             check_time += timedelta(minutes=30)
         
+        existing_booking = db.session.query(Booking.id).filter(
+            Booking.salon_id == data['salon_id'],
+            Booking.booking_date == booking_date,
+            Booking.booking_time.in_(slot_times),
+            Booking.status.in_(['confirmed', 'pending'])
+        ).first()
+        
+        if existing_booking:
+            return jsonify({'error': 'Time slot already booked'}), 400
+        
         # Create booking records for each 30-minute slot that the service occupies
         created_bookings = []
-        check_time = booking_start
         
-        while check_time < booking_end:
-            slot_time = check_time.time()
-            
+        for slot_time in slot_times:
             booking = Booking(
                 salon_id=data['salon_id'],
                 service_id=data['service_id'],
@@ -680,7 +1316,6 @@ def create_booking():
             
             db.session.add(booking)
             created_bookings.append(booking)
-            check_time += timedelta(minutes=30)
         
         db.session.commit()
         
@@ -698,22 +1333,12 @@ def create_booking():
 def get_booking(booking_id):
     booking = Booking.query.get_or_404(booking_id)
     
-    return jsonify({
-        'id': booking.id,
-        'salon_id': booking.salon_id,
-        'service_id': booking.service_id,
-        'customer_name': booking.customer_name,
-        'customer_email': booking.customer_email,
-        'customer_phone': booking.customer_phone,
-        'booking_date': booking.booking_date.isoformat(),
-        'booking_time': booking.booking_time.strftime('%H:%M'),
-        'duration': booking.duration,
-        'status': booking.status,
-        'created_at': booking.created_at.isoformat()
-    })
+    return jsonify(serializers.booking.obj(booking))
 
 # Review endpoints
 @app.route('/api/salons/<int:salon_id>/reviews', methods=['GET'])
+@replicas.read_only
+@conditional(salon_version)
 def get_salon_reviews(salon_id):
     """Get all reviews for a salon"""
     page = request.args.get('page', 1, type=int)
@@ -723,34 +1348,22 @@ def get_salon_reviews(salon_id):
         .order_by(Review.created_at.desc())\
         .paginate(page=page, per_page=per_page, error_out=False)
     
-    # Calculate average rating
-    all_reviews = Review.query.filter_by(salon_id=salon_id).all()
-    avg_rating = sum(review.rating for review in all_reviews) / len(all_reviews) if all_reviews else 0
-    total_reviews = len(all_reviews)
+    # Summary maintained on the salon row by refresh_review_summaries
+    summary = db.session.query(Salon.rating_avg, Salon.review_count).filter(Salon.id == salon_id).first()
     
     return jsonify({
-        'reviews': [{
-            'id': review.id,
-            'customer_name': review.customer_name,
-            'rating': review.rating,
-            'title': review.title,
-            'comment': review.comment,
-            'created_at': review.created_at.isoformat(),
-            'is_verified': review.is_verified
-        } for review in reviews.items],
+        'reviews': serializers.review.objs(reviews.items),
         'pagination': {
             'page': page,
             'per_page': per_page,
             'total': reviews.total,
             'pages': reviews.pages
         },
-        'summary': {
-            'average_rating': round(avg_rating, 1),
-            'total_reviews': total_reviews
-        }
+        'summary': review_summary(*summary) if summary else review_summary(0, 0)
     })
 
 @app.route('/api/salons/<int:salon_id>/reviews', methods=['POST'])
+@rate_limiter.limit('review', ip='10/minute', customer_email='5/hour')
 def create_review(salon_id):
     """Create a new review for a salon"""
     data = request.get_json()
@@ -780,56 +1393,25 @@ def create_review(salon_id):
     db.session.add(review)
     db.session.commit()
     
-    return jsonify({
-        'id': review.id,
-        'customer_name': review.customer_name,
-        'rating': review.rating,
-        'title': review.title,
-        'comment': review.comment,
-        'created_at': review.created_at.isoformat(),
-        'is_verified': review.is_verified
-    }), 201
+    return jsonify(serializers.review.obj(review)), 201
 
 # Manager-specific routes
 @app.route('/api/manager/salons', methods=['GET'])
 @require_auth
 def get_manager_salons():
     """Get all salons owned by the current user"""
-    salons = Salon.query.filter_by(owner_id=request.current_user.id).all()
+    salons = db.session.query(*serializers.salon_manager.columns(Salon)).filter(
+        Salon.owner_id == request.current_user.id
+    ).all()
+    
+    # Get images for all salons in one query, sorted by primary first, then display_order
+    images_by_salon = get_images_for_salons([salon.id for salon in salons])
     
     result = []
     for salon in salons:
-        # Get salon images, sorted by primary first, then display_order
-        images = []
-        for image in salon.images.order_by(SalonImage.is_primary.desc(), SalonImage.display_order).all():
-            images.append({
-                'id': image.id,
-                'salon_id': image.salon_id,
-                'image_url': image.image_url,
-                'image_alt': image.image_alt,
-                'is_primary': image.is_primary,
-                'display_order': image.display_order,
-                'created_at': image.created_at.isoformat()
-            })
-        
-        result.append({
-            'id': salon.id,
-            'nome': salon.nome,
-            'cidade': salon.cidade,
-            'regiao': salon.regiao,
-            'telefone': salon.telefone,
-            'email': salon.email,
-            'website': salon.website,
-            'rua': salon.rua,
-            'porta': salon.porta,
-            'cod_postal': salon.cod_postal,
-            'about': salon.about,
-            'estado': salon.estado,
-            'booking_enabled': salon.booking_enabled,
-            'is_bio_diamond': salon.is_bio_diamond,
-            'created_at': salon.created_at.isoformat(),
-            'images': images
-        })
+        data = serializers.salon_manager.row(salon)
+        data['images'] = images_by_salon.get(salon.id, [])
+        result.append(data)
     
     return jsonify(result)
 
@@ -866,6 +1448,7 @@ def create_salon():
     
     # Create default time slots for the new salon
     create_default_time_slots(salon.id)
+    enqueue_geocoding(salon)
     db.session.commit()
     
     return jsonify({
@@ -882,20 +1465,58 @@ def get_salon_bookings(salon_id):
     if not salon:
         return jsonify({'error': 'Salon not found or access denied'}), 404
     
-    bookings = Booking.query.filter_by(salon_id=salon_id).order_by(Booking.booking_date.desc()).all()
-    
-    return jsonify([{
-        'id': booking.id,
-        'customer_name': booking.customer_name,
-        'customer_email': booking.customer_email,
-        'customer_phone': booking.customer_phone,
-        'service_id': booking.service_id,
-        'booking_date': booking.booking_date.isoformat(),
-        'booking_time': booking.booking_time.strftime('%H:%M'),
-        'duration': booking.duration,
-        'status': booking.status,
-        'created_at': booking.created_at.isoformat()
-    } for booking in bookings])
+    bookings = db.session.query(*serializers.salon_booking.columns(Booking)).filter(
+        Booking.salon_id == salon_id
+    ).order_by(Booking.booking_date.desc()).all()
+    
+    return jsonify(serializers.salon_booking.rows(bookings))
+
+def export_params():
+    """format and start_date/end_date of an export request, returns
+    ((format, start, end), error response)"""
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in exports.FORMATS:
+        return None, (jsonify({'error': f"Invalid format, use one of: {', '.join(exports.FORMATS)}"}), 400)
+    try:
+        start, end = parse_date_range(request.args)
+    except ValueError:
+        return None, (jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400)
+    return (export_format, start, end), None
+
+def filter_dates(query, column, start, end):
+    """Restrict a Date column to [start, end]"""
+    if start:
+        query = query.filter(column >= start)
+    if end:
+        query = query.filter(column <= end)
+    return query
+
+def filter_datetimes(query, column, start, end):
+    """Restrict a DateTime column to the days start through end"""
+    if start:
+        query = query.filter(column >= datetime.combine(start, time.min))
+    if end:
+        query = query.filter(column < datetime.combine(end + timedelta(days=1), time.min))
+    return query
+
+@app.route('/api/manager/salons/<int:salon_id>/bookings/export', methods=['GET'])
+@require_auth
+@replicas.read_only
+def export_salon_bookings(salon_id):
+    """Stream the bookings of an owned salon as CSV or NDJSON"""
+    salon = Salon.query.filter_by(id=salon_id, owner_id=request.current_user.id).first()
+    if not salon:
+        return jsonify({'error': 'Salon not found or access denied'}), 404
+    params, error = export_params()
+    if error:
+        return error
+    export_format, start, end = params
+    
+    query = db.session.query(*serializers.salon_booking.columns(Booking)).filter(Booking.salon_id == salon_id)
+    query = filter_dates(query, Booking.booking_date, start, end)
+    query = query.order_by(Booking.booking_date, Booking.booking_time, Booking.id)
+    
+    return exports.export_response(serializers.salon_booking, query, export_format, f'bookings-salon-{salon_id}')
 
 @app.route('/api/manager/salons/<int:salon_id>/services', methods=['GET'])
 @require_auth
@@ -905,20 +1526,11 @@ def get_salon_services(salon_id):
     if not salon:
         return jsonify({'error': 'Salon not found or access denied'}), 404
     
-    salon_services = db.session.query(SalonService, Service).join(Service).filter(
+    salon_services = db.session.query(*MANAGED_SALON_SERVICE_COLUMNS).filter(
         SalonService.salon_id == salon_id
     ).all()
     
-    return jsonify([{
-        'id': salon_service.id,
-        'service_id': service.id,
-        'name': service.name,
-        'category': service.category,
-        'description': service.description,
-        'is_bio_diamond': service.is_bio_diamond,
-        'price': salon_service.price,
-        'duration': salon_service.duration
-    } for salon_service, service in salon_services])
+    return jsonify(serializers.managed_salon_service.rows(service_catalog.join(salon_services, 1)))
 
 @app.route('/api/manager/salons/<int:salon_id>/opening-hours', methods=['GET'])
 @require_auth
@@ -928,23 +1540,25 @@ def get_salon_opening_hours(salon_id):
     if not salon:
         return jsonify({'error': 'Salon not found'}), 404
     
-    # Get all time slots for this salon
-    time_slots = TimeSlot.query.filter_by(salon_id=salon_id).all()
+    # Cached weekly schedule, exact for the salon row just read
+    salon_schedule = salon_schedules.get(salon_id, salon.updated_at)
     
     # Organize by day of week
     opening_hours = {}
     for day in range(7):  # 0=Monday, 6=Sunday
-        day_slots = [slot for slot in time_slots if slot.day_of_week == day]
-        if day_slots:
-            # Get the earliest start and latest end for this day
-            start_times = [slot.start_time for slot in day_slots if slot.start_time]
-            end_times = [slot.end_time for slot in day_slots if slot.end_time]
-            if start_times and end_times:
-                opening_hours[day] = {
-                    'start_time': min(start_times).strftime('%H:%M'),
-                    'end_time': max(end_times).strftime('%H:%M'),
-                    'is_open': True
-                }
+        windows = salon_schedule.windows[day]
+        if windows:
+            # The earliest start and latest end for this day, and each
+            # window for split shifts
+            opening_hours[day] = {
+                'start_time': schedule.format_minute(windows[0][0]),
+                'end_time': schedule.format_minute(max(end for _, end in windows)),
+                'is_open': True,
+                'windows': [
+                    {'start_time': schedule.format_minute(start), 'end_time': schedule.format_minute(end)}
+                    for start, end in windows
+                ]
+            }
         else:
             opening_hours[day] = {
                 'start_time': None,
@@ -963,32 +1577,330 @@ def update_salon_opening_hours(salon_id):
         return jsonify({'error': 'Salon not found'}), 404
     
     data = request.get_json()
-    opening_hours = data.get('opening_hours', {})
+    try:
+        windows = parse_opening_hours(data.get('opening_hours') if isinstance(data, dict) else None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Delete existing time slots for this salon
     TimeSlot.query.filter_by(salon_id=salon_id).delete()
+    touch_salons([salon_id])
     
     # Create new time slots based on opening hours
+    for day, start_time, end_time in windows:
+        time_slot = TimeSlot(
+            salon_id=salon_id,
+            day_of_week=day,
+            start_time=start_time,
+            end_time=end_time,
+            is_available=True
+        )
+        db.session.add(time_slot)
+    
+    db.session.commit()
+    return jsonify({'message': 'Opening hours updated successfully'})
+
+OPENING_HOURS_DAYS = {str(day) for day in range(7)}
+
+def parse_opening_hours(opening_hours):
+    """(day, start time, end time) windows of an opening_hours payload,
+    one per window when a day has split shifts. Every day is checked
+    before returning; raises ValueError with a message for the client."""
+    if not isinstance(opening_hours, dict):
+        raise ValueError('opening_hours must be an object keyed by day of week (0-6)')
+    windows = []
     for day, hours in opening_hours.items():
+        if day not in OPENING_HOURS_DAYS:
+            raise ValueError(f'Invalid day of week {day!r}, use 0 (Monday) to 6 (Sunday)')
         day = int(day)
-        if hours.get('is_open') and hours.get('start_time') and hours.get('end_time'):
+        if not isinstance(hours, dict):
+            raise ValueError(f'Opening hours for day {day} must be an object')
+        if not hours.get('is_open'):
+            continue
+        day_windows = hours.get('windows') or [hours]
+        if not isinstance(day_windows, list) or not all(isinstance(window, dict) for window in day_windows):
+            raise ValueError(f'windows for day {day} must be a list of objects')
+        for window in day_windows:
+            if not (window.get('start_time') and window.get('end_time')):
+                continue
             try:
-                start_time = datetime.strptime(hours['start_time'], '%H:%M').time()
-                end_time = datetime.strptime(hours['end_time'], '%H:%M').time()
-                
-                time_slot = TimeSlot(
-                    salon_id=salon_id,
-                    day_of_week=day,
-                    start_time=start_time,
-                    end_time=end_time,
-                    is_available=True
-                )
-                db.session.add(time_slot)
-            except ValueError:
-                return jsonify({'error': f'Invalid time format for day {day}'}), 400
+                start_time = datetime.strptime(window['start_time'], '%H:%M').time()
+                end_time = datetime.strptime(window['end_time'], '%H:%M').time()
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid time format for day {day}')
+            if start_time >= end_time:
+                raise ValueError(f'Opening time must be before closing time for day {day}')
+            windows.append((day, start_time, end_time))
+    return windows
+
+# Bulk management across the current user's salons
+MAX_BULK_SALONS = 500
+
+def owned_salon_ids(data):
+    """Validate ``data['salon_ids']`` against the current user's salons
+    with one query, returns (salon ids, error response)"""
+    salon_ids = data.get('salon_ids') if isinstance(data, dict) else None
+    if (not isinstance(salon_ids, list) or not salon_ids
+            or not all(isinstance(salon_id, int) for salon_id in salon_ids)):
+        return None, (jsonify({'error': 'salon_ids must be a non-empty list of salon ids'}), 400)
+    salon_ids = sorted(set(salon_ids))
+    if len(salon_ids) > MAX_BULK_SALONS:
+        return None, (jsonify({'error': f'At most {MAX_BULK_SALONS} salons per request'}), 400)
+    
+    owned = {salon_id for (salon_id,) in db.session.query(Salon.id).filter(
+        Salon.id.in_(salon_ids),
+        Salon.owner_id == request.current_user.id
+    )}
+    missing = [salon_id for salon_id in salon_ids if salon_id not in owned]
+    if missing:
+        return None, (jsonify({'error': 'Salon not found or access denied', 'salon_ids': missing}), 404)
+    return salon_ids, None
+
+def price_list_item_error(service):
+    """Why a price list entry is invalid, None when it is valid"""
+    if not isinstance(service, dict):
+        return 'must be an object with service_id, price and duration'
+    for field in ('service_id', 'price', 'duration'):
+        if field not in service:
+            return f'Missing required field: {field}'
+    if not isinstance(service['service_id'], int) or isinstance(service['service_id'], bool):
+        return 'service_id must be an integer'
+    price = service['price']
+    if not isinstance(price, (int, float)) or isinstance(price, bool) or not math.isfinite(price) or price < 0:
+        return 'price must be a non-negative number'
+    duration = service['duration']
+    if not isinstance(duration, int) or isinstance(duration, bool) or duration < 0:
+        return 'duration must be a non-negative number of minutes'
+    return None
+
+@app.route('/api/manager/salons/bulk/opening-hours', methods=['PUT'])
+@require_auth
+def bulk_update_opening_hours():
+    """Apply one set of opening hours to many owned salons in one transaction"""
+    data = request.get_json()
+    salon_ids, error = owned_salon_ids(data)
+    if error:
+        return error
+    try:
+        windows = parse_opening_hours(data.get('opening_hours'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # One delete and one multi-row insert for all the salons
+    TimeSlot.query.filter(TimeSlot.salon_id.in_(salon_ids)).delete(synchronize_session=False)
+    rows = [
+        {'salon_id': salon_id, 'day_of_week': day, 'start_time': start_time,
+         'end_time': end_time, 'is_available': True}
+        for salon_id in salon_ids for day, start_time, end_time in windows
+    ]
+    if rows:
+        db.session.execute(TimeSlot.__table__.insert(), rows)
+    touch_salons(salon_ids)
+    db.session.commit()
     
+    return jsonify({'message': f'Opening hours updated for {len(salon_ids)} salons', 'salons': len(salon_ids)})
+
+@app.route('/api/manager/salons/bulk/services', methods=['PUT'])
+@require_auth
+def bulk_update_services():
+    """Apply a price list to many owned salons in one transaction: each
+    service is updated where the salon offers it and added elsewhere"""
+    data = request.get_json()
+    salon_ids, error = owned_salon_ids(data)
+    if error:
+        return error
+    
+    services = data.get('services')
+    if not isinstance(services, list) or not services:
+        return jsonify({'error': 'services must be a non-empty list'}), 400
+    catalog = service_catalog.get().by_id
+    prices = {}
+    for index, service in enumerate(services):
+        error = price_list_item_error(service)
+        if error:
+            return jsonify({'error': f'services[{index}]: {error}', 'item': service}), 400
+        if service['service_id'] not in catalog:
+            return jsonify({'error': f"Service {service['service_id']} not found"}), 404
+        prices[service['service_id']] = (service['price'], service['duration'])
+    
+    existing = set(db.session.query(SalonService.salon_id, SalonService.service_id).filter(
+        SalonService.salon_id.in_(salon_ids),
+        SalonService.service_id.in_(sorted(prices))
+    ))
+    updates, inserts = [], []
+    for salon_id in salon_ids:
+        for service_id, (price, duration) in prices.items():
+            row = {'b_salon_id': salon_id, 'b_service_id': service_id, 'b_price': price, 'b_duration': duration}
+            (updates if (salon_id, service_id) in existing else inserts).append(row)
+    
+    # Executemany statements, a single round trip each
+    table = SalonService.__table__
+    if updates:
+        db.session.execute(
+            table.update().where(
+                table.c.salon_id == db.bindparam('b_salon_id'),
+                table.c.service_id == db.bindparam('b_service_id')
+            ).values(price=db.bindparam('b_price'), duration=db.bindparam('b_duration')),
+            updates
+        )
+    if inserts:
+        db.session.execute(table.insert().values(
+            salon_id=db.bindparam('b_salon_id'), service_id=db.bindparam('b_service_id'),
+            price=db.bindparam('b_price'), duration=db.bindparam('b_duration')
+        ), inserts)
+    touch_salons(salon_ids)
     db.session.commit()
-    return jsonify({'message': 'Opening hours updated successfully'})
+    
+    return jsonify({
+        'message': f'Price list applied to {len(salon_ids)} salons',
+        'salons': len(salon_ids),
+        'updated': len(updates),
+        'created': len(inserts)
+    })
+
+MAX_EXCEPTION_DATES = 731
+
+def parse_date_range(args):
+    """start_date/end_date of a mapping as dates, None when absent"""
+    start = args.get('start_date')
+    end = args.get('end_date')
+    return (
+        datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+        datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    )
+
+def parse_exception_entry(entry):
+    """(start date, end date, start time, end time, note) of one exception
+    entry, ValueError with a message for the client when it is invalid"""
+    if not isinstance(entry, dict):
+        raise ValueError('must be an object with a date or a start_date and end_date')
+    try:
+        if entry.get('date'):
+            start = end = datetime.strptime(entry['date'], '%Y-%m-%d').date()
+        else:
+            start, end = parse_date_range(entry)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+    if start is None or end is None or end < start:
+        raise ValueError('Each exception needs a date or a start_date and end_date')
+    try:
+        start_time = datetime.strptime(entry['start_time'], '%H:%M').time() if entry.get('start_time') else None
+        end_time = datetime.strptime(entry['end_time'], '%H:%M').time() if entry.get('end_time') else None
+    except (TypeError, ValueError):
+        raise ValueError('Invalid time format. Use HH:MM')
+    if (start_time is None) != (end_time is None) or (start_time and start_time >= end_time):
+        raise ValueError('Reduced hours need a start_time before the end_time')
+    note = entry.get('note')
+    if note is not None and not isinstance(note, str):
+        raise ValueError('note must be a string')
+    return start, end, start_time, end_time, note
+
+def schedule_exception_rows(salon_id, entries):
+    """Expand exception entries into schedule_exceptions rows.
+    
+    An entry has ``date`` or ``start_date``/``end_date`` (inclusive), and
+    ``start_time``/``end_time`` for reduced hours or neither for a closed
+    day. Raises ValueError with a message for the client naming the entry.
+    """
+    rows = []
+    now = datetime.utcnow()
+    for index, entry in enumerate(entries):
+        try:
+            start, end, start_time, end_time, note = parse_exception_entry(entry)
+        except ValueError as e:
+            raise ValueError(f'exceptions[{index}]: {e}')
+        
+        for offset in range((end - start).days + 1):
+            rows.append({
+                'salon_id': salon_id,
+                'date': start + timedelta(days=offset),
+                'start_time': start_time,
+                'end_time': end_time,
+                'note': note,
+                'created_at': now
+            })
+            if len(rows) > MAX_EXCEPTION_DATES:
+                raise ValueError(f'At most {MAX_EXCEPTION_DATES} exception dates per request')
+    return rows
+
+@app.route('/api/manager/salons/<int:salon_id>/exceptions', methods=['GET'])
+@require_auth
+def get_salon_exceptions(salon_id):
+    """Closed days and reduced hours of a salon, from today by default"""
+    salon = Salon.query.filter_by(id=salon_id, owner_id=request.current_user.id).first()
+    if not salon:
+        return jsonify({'error': 'Salon not found'}), 404
+    
+    try:
+        start, end = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    query = db.session.query(*serializers.schedule_exception.columns(ScheduleException)).filter(
+        ScheduleException.salon_id == salon_id,
+        ScheduleException.date >= (start or datetime.utcnow().date())
+    )
+    if end:
+        query = query.filter(ScheduleException.date <= end)
+    exceptions = query.order_by(ScheduleException.date, ScheduleException.start_time).all()
+    
+    return jsonify({
+        'exceptions': serializers.schedule_exception.rows(exceptions),
+        'holiday_calendar': salon.holiday_calendar
+    })
+
+@app.route('/api/manager/salons/<int:salon_id>/exceptions', methods=['POST'])
+@require_auth
+def add_salon_exceptions(salon_id):
+    """Add closed days or reduced hours in bulk, e.g. a whole year at once.
+    The exceptions of each date given replace that date's previous ones."""
+    salon = Salon.query.filter_by(id=salon_id, owner_id=request.current_user.id).first()
+    if not salon:
+        return jsonify({'error': 'Salon not found'}), 404
+    
+    data = request.get_json()
+    entries = data.get('exceptions') if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'exceptions must be a non-empty list'}), 400
+    try:
+        rows = schedule_exception_rows(salon_id, entries)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # One delete and one multi-row insert whatever the number of dates
+    ScheduleException.query.filter(
+        ScheduleException.salon_id == salon_id,
+        ScheduleException.date.in_(sorted({row['date'] for row in rows}))
+    ).delete(synchronize_session=False)
+    db.session.execute(ScheduleException.__table__.insert(), rows)
+    touch_salons([salon_id])
+    db.session.commit()
+    
+    return jsonify({'message': f'{len(rows)} schedule exceptions saved', 'created': len(rows)}), 201
+
+@app.route('/api/manager/salons/<int:salon_id>/exceptions', methods=['DELETE'])
+@require_auth
+def delete_salon_exceptions(salon_id):
+    """Remove the exceptions between start_date and end_date"""
+    salon = Salon.query.filter_by(id=salon_id, owner_id=request.current_user.id).first()
+    if not salon:
+        return jsonify({'error': 'Salon not found'}), 404
+    
+    try:
+        start, end = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    if start is None or end is None:
+        return jsonify({'error': 'start_date and end_date are required'}), 400
+    
+    deleted = ScheduleException.query.filter(
+        ScheduleException.salon_id == salon_id,
+        ScheduleException.date.between(start, end)
+    ).delete(synchronize_session=False)
+    touch_salons([salon_id])
+    db.session.commit()
+    
+    return jsonify({'message': f'{deleted} schedule exceptions deleted', 'deleted': deleted})
 
 @app.route('/api/manager/salons/<int:salon_id>', methods=['PUT'])
 @require_auth
@@ -1001,11 +1913,15 @@ def update_salon(salon_id):
     data = request.get_json()
     
     # Update salon fields
-    updatable_fields = ['nome', 'telefone', 'email', 'website', 'regiao', 'cidade', 'rua', 'porta', 'cod_postal', 'about']
+    updatable_fields = ['nome', 'telefone', 'email', 'website', 'regiao', 'cidade', 'rua', 'porta', 'cod_postal', 'about',
+                        'holiday_calendar']
+    address = salon_address(salon)
     for field in updatable_fields:
         if field in data:
             setattr(salon, field, data[field])
     
+    if salon_address(salon) != address:
+        enqueue_geocoding(salon)
     db.session.commit()
     return jsonify({'message': 'Salon updated successfully'})
 
@@ -1148,9 +2064,14 @@ def get_all_users():
         page=page, per_page=per_page, error_out=False
     )
     
+    # Count salons for all users on the page in one query
+    salon_counts = dict(db.session.query(Salon.owner_id, db.func.count(Salon.id)).filter(
+        Salon.owner_id.in_([user.id for user in users.items])
+    ).group_by(Salon.owner_id).all())
+    
     user_data = []
     for user in users.items:
-        salon_count = user.salons.count()
+        salon_count = salon_counts.get(user.id, 0)
         user_data.append({
             'id': user.id,
             'name': user.name,
@@ -1174,22 +2095,9 @@ def get_user_details(user_id):
     """Get detailed information about a specific user and their salons"""
     user = User.query.get_or_404(user_id)
     
-    salons = user.salons.all()
-    salon_data = []
-    
-    for salon in salons:
-        salon_data.append({
-            'id': salon.id,
-            'nome': salon.nome,
-            'cidade': salon.cidade,
-            'regiao': salon.regiao,
-            'telefone': salon.telefone,
-            'email': salon.email,
-            'estado': salon.estado,
-            'booking_enabled': salon.booking_enabled,
-            'is_active': salon.is_active,
-            'created_at': salon.created_at.isoformat()
-        })
+    salon_data = serializers.salon_summary.rows(
+        user.salons.with_entities(*serializers.salon_summary.columns(Salon)).all()
+    )
     
     return jsonify({
         'user': {
@@ -1214,7 +2122,11 @@ def toggle_user_status(user_id):
         return jsonify({'error': 'Cannot deactivate your own account'}), 400
     
     user.is_active = not user.is_active
-    db.session.commit()
+    if user.is_active:
+        db.session.commit()
+    else:
+        # Deactivated users lose their sessions immediately
+        revoke_tokens(user)
     
     return jsonify({
         'message': f'User {"activated" if user.is_active else "deactivated"} successfully',
@@ -1228,51 +2140,33 @@ def get_all_salons():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
-    salons = Salon.query.paginate(
+    # Owner columns come from the same query instead of a lazy load per salon
+    owner_offset = len(serializers.salon_admin.fields)
+    salons = db.session.query(
+        *serializers.salon_admin.columns(Salon),
+        User.id.label('owner_id'), User.name.label('owner_name'),
+        User.email.label('owner_email'), User.customer_id.label('owner_customer_id')
+    ).outerjoin(User, Salon.owner_id == User.id).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
+    # Get services for all salons in one query
+    services_by_salon = get_services_for_salons([salon.id for salon in salons.items])
+    
     salon_data = []
     for salon in salons.items:
-        owner = salon.owner
-        
-        # Get salon services
-        salon_services = db.session.query(SalonService, Service).join(Service).filter(
-            SalonService.salon_id == salon.id
-        ).all()
+        services = services_by_salon.get(salon.id, [])
         
-        services = [{
-            'id': salon_service.id,
-            'service_id': service.id,
-            'name': service.name,
-            'category': service.category,
-            'description': service.description,
-            'is_bio_diamond': service.is_bio_diamond,
-            'price': salon_service.price,
-            'duration': salon_service.duration
-        } for salon_service, service in salon_services]
-        
-        salon_data.append({
-            'id': salon.id,
-            'nome': salon.nome,
-            'cidade': salon.cidade,
-            'regiao': salon.regiao,
-            'telefone': salon.telefone,
-            'email': salon.email,
-            'estado': salon.estado,
-            'booking_enabled': salon.booking_enabled,
-            'is_active': salon.is_active,
-            'is_bio_diamond': salon.is_bio_diamond,
-            'owner': {
-                'id': owner.id if owner else None,
-                'name': owner.name if owner else 'No Owner',
-                'email': owner.email if owner else None,
-                'customer_id': owner.customer_id if owner else None
-            } if owner else None,
-            'services': services,
-            'services_count': len(services),
-            'created_at': salon.created_at.isoformat()
-        })
+        data = serializers.salon_admin.row(salon[:owner_offset])
+        data['owner'] = {
+            'id': salon.owner_id,
+            'name': salon.owner_name,
+            'email': salon.owner_email,
+            'customer_id': salon.owner_customer_id
+        } if salon.owner_id is not None else None
+        data['services'] = services
+        data['services_count'] = len(services)
+        salon_data.append(data)
     
     return jsonify({
         'salons': salon_data,
@@ -1361,25 +2255,221 @@ def get_admin_stats():
         }
     })
 
+@app.route('/api/admin/holidays', methods=['GET'])
+@require_admin
+def get_holidays():
+    """Holidays of a calendar, optionally for one year"""
+    calendar = request.args.get('calendar')
+    year = request.args.get('year', type=int)
+    if not calendar:
+        return jsonify({'error': 'calendar parameter required'}), 400
+    
+    query = db.session.query(*serializers.holiday.columns(Holiday)).filter(Holiday.calendar == calendar)
+    if year:
+        query = query.filter(Holiday.date.between(datetime(year, 1, 1).date(), datetime(year, 12, 31).date()))
+    
+    return jsonify({'calendar': calendar, 'holidays': serializers.holiday.rows(query.order_by(Holiday.date).all())})
+
+@app.route('/api/admin/holidays', methods=['PUT'])
+@require_admin
+def replace_holidays():
+    """Replace the holidays of a calendar for one year"""
+    data = request.get_json() or {}
+    calendar = data.get('calendar')
+    year = data.get('year')
+    holidays = data.get('holidays')
+    if not calendar or not isinstance(year, int) or not isinstance(holidays, list):
+        return jsonify({'error': 'calendar, year and a holidays list are required'}), 400
+    
+    rows = {}
+    try:
+        for holiday in holidays:
+            day = datetime.strptime(holiday['date'], '%Y-%m-%d').date()
+            if day.year != year:
+                return jsonify({'error': f"{holiday['date']} is not in {year}"}), 400
+            rows[day] = {'calendar': calendar, 'date': day, 'name': holiday.get('name')}
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Each holiday needs a date in YYYY-MM-DD format'}), 400
+    
+    Holiday.query.filter(
+        Holiday.calendar == calendar,
+        Holiday.date.between(datetime(year, 1, 1).date(), datetime(year, 12, 31).date())
+    ).delete(synchronize_session=False)
+    if rows:
+        db.session.execute(Holiday.__table__.insert(), list(rows.values()))
+    db.session.commit()
+    
+    return jsonify({'message': f'{len(rows)} holidays saved for {calendar} {year}', 'holidays': len(rows)})
+
+@app.route('/api/admin/export/bookings', methods=['GET'])
+@require_admin
+@replicas.read_only
+def export_bookings():
+    """Stream all bookings, optionally of one salon, as CSV or NDJSON"""
+    params, error = export_params()
+    if error:
+        return error
+    export_format, start, end = params
+    
+    query = db.session.query(*serializers.booking.columns(Booking))
+    salon_id = request.args.get('salon_id', type=int)
+    if salon_id:
+        query = query.filter(Booking.salon_id == salon_id)
+    query = filter_dates(query, Booking.booking_date, start, end).order_by(Booking.id)
+    
+    return exports.export_response(serializers.booking, query, export_format, 'bookings')
+
+@app.route('/api/admin/export/reviews', methods=['GET'])
+@require_admin
+@replicas.read_only
+def export_reviews():
+    """Stream all reviews, optionally of one salon, as CSV or NDJSON"""
+    params, error = export_params()
+    if error:
+        return error
+    export_format, start, end = params
+    
+    query = db.session.query(*serializers.review_export.columns(Review))
+    salon_id = request.args.get('salon_id', type=int)
+    if salon_id:
+        query = query.filter(Review.salon_id == salon_id)
+    query = filter_datetimes(query, Review.created_at, start, end).order_by(Review.id)
+    
+    return exports.export_response(serializers.review_export, query, export_format, 'reviews')
+
+@app.route('/api/admin/export/salons', methods=['GET'])
+@require_admin
+@replicas.read_only
+def export_salons():
+    """Stream all salons as CSV or NDJSON, by creation date"""
+    params, error = export_params()
+    if error:
+        return error
+    export_format, start, end = params
+    
+    query = db.session.query(*serializers.salon_admin.columns(Salon))
+    query = filter_datetimes(query, Salon.created_at, start, end).order_by(Salon.id)
+    
+    return exports.export_response(serializers.salon_admin, query, export_format, 'salons')
+
+@app.route('/api/admin/jobs', methods=['GET'])
+@require_admin
+def get_jobs():
+    """Job counts per status and the newest jobs, optionally filtered"""
+    status = request.args.get('status')
+    limit = request.args.get('limit', 50, type=int)
+    if limit < 1 or limit > 500:
+        return jsonify({'error': 'limit must be between 1 and 500'}), 400
+    
+    query = db.session.query(*serializers.job.columns(Job))
+    if status:
+        query = query.filter(Job.status == status)
+    if request.args.get('name'):
+        query = query.filter(Job.name == request.args['name'])
+    
+    return jsonify({
+        'counts': jobs.stats(),
+        'tasks': sorted(jobs.tasks),
+        'jobs': serializers.job.rows(query.order_by(Job.id.desc()).limit(limit).all())
+    })
+
+@app.route('/api/admin/jobs', methods=['POST'])
+@require_admin
+def create_job():
+    """Enqueue a registered task, e.g. a statistics refresh"""
+    data = request.get_json() or {}
+    name = data.get('name')
+    if name not in jobs.tasks:
+        return jsonify({'error': f'name must be one of: {", ".join(sorted(jobs.tasks))}'}), 400
+    payload = data.get('payload') or {}
+    delay = data.get('delay_seconds', 0)
+    if not isinstance(payload, dict) or not isinstance(delay, (int, float)) or delay < 0:
+        return jsonify({'error': 'payload must be an object and delay_seconds a non-negative number'}), 400
+    
+    key = data.get('idempotency_key')
+    job = jobs.enqueue(name, payload, delay=delay, idempotency_key=key)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Enqueued concurrently with the same key
+        db.session.rollback()
+        job = Job.query.filter_by(idempotency_key=key).one()
+    return jsonify(serializers.job.obj(job)), 202
+
+@app.route('/api/admin/jobs/<int:job_id>/retry', methods=['POST'])
+@require_admin
+def retry_job(job_id):
+    """Queue a failed job again"""
+    job = Job.query.get_or_404(job_id)
+    if job.status != 'failed':
+        return jsonify({'error': 'Only failed jobs can be retried'}), 400
+    
+    jobs.retry(job)
+    db.session.commit()
+    return jsonify(serializers.job.obj(job)), 202
+
+@app.route('/api/admin/cache', methods=['GET'])
+@require_admin
+def get_cache_stats():
+    """Get response cache statistics"""
+    return jsonify({
+        'response_cache': response_cache.stats(),
+        'salon_index': salon_index.stats(),
+        'schedules': salon_schedules.stats(),
+        'catalog': service_catalog.stats(),
+        'token_versions': token_versions.stats()
+    })
+
+@app.route('/api/admin/cache', methods=['DELETE'])
+@require_admin
+def clear_cache():
+    """Drop all cached responses"""
+    response_cache.clear()
+    return jsonify({'message': 'Cache cleared successfully'})
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@require_admin
+def get_profiles():
+    """List stored request profiles, newest first"""
+    return jsonify({'profiles': profiler.store.list()})
+
+@app.route('/api/admin/profiles/<int:profile_id>', methods=['GET'])
+@require_admin
+def get_profile(profile_id):
+    """Download a profile as a pstats text report or as a .prof file"""
+    record = profiler.store.get(profile_id)
+    if record is None:
+        return jsonify({'error': 'Profile not found'}), 404
+
+    if request.args.get('format') == 'pstats':
+        return app.response_class(
+            record.pstats_bytes(),
+            mimetype='application/octet-stream',
+            headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.prof'}
+        )
+
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'ncalls', 'filename'):
+        return jsonify({'error': 'sort must be cumulative, tottime, ncalls or filename'}), 400
+    limit = request.args.get('limit', 40, type=int)
+    return jsonify({**record.to_dict(), 'report': record.text(sort, limit)})
+
+@app.route('/api/admin/profiles', methods=['DELETE'])
+@require_admin
+def clear_profiles():
+    """Drop all stored profiles"""
+    profiler.store.clear()
+    return jsonify({'message': 'Profiles cleared successfully'})
+
 # Image Management Endpoints
 @app.route('/api/salons/<int:salon_id>/images', methods=['GET'])
+@replicas.read_only
+@conditional(salon_version)
 def get_salon_images(salon_id):
     """Get all images for a salon"""
-    salon = Salon.query.get_or_404(salon_id)
-    
-    images = []
-    for image in salon.images.order_by(SalonImage.is_primary.desc(), SalonImage.display_order).all():
-        images.append({
-            'id': image.id,
-            'salon_id': image.salon_id,
-            'image_url': image.image_url,
-            'image_alt': image.image_alt,
-            'is_primary': image.is_primary,
-            'display_order': image.display_order,
-            'created_at': image.created_at.isoformat()
-        })
+    Salon.query.get_or_404(salon_id)
     
-    return jsonify({'images': images})
+    return jsonify({'images': get_images_for_salon(salon_id)})
 
 @app.route('/api/salons/<int:salon_id>/images', methods=['POST'])
 @require_auth
@@ -1415,15 +2505,7 @@ def add_salon_image(salon_id):
     db.session.add(image)
     db.session.commit()
     
-    return jsonify({
-        'id': image.id,
-        'salon_id': image.salon_id,
-        'image_url': image.image_url,
-        'image_alt': image.image_alt,
-        'is_primary': image.is_primary,
-        'display_order': image.display_order,
-        'created_at': image.created_at.isoformat()
-    }), 201
+    return jsonify(serializers.image.obj(image)), 201
 
 @app.route('/api/salons/<int:salon_id>/images/<int:image_id>', methods=['PUT'])
 @require_auth
@@ -1451,15 +2533,7 @@ def update_salon_image(salon_id, image_id):
     
     db.session.commit()
     
-    return jsonify({
-        'id': image.id,
-        'salon_id': image.salon_id,
-        'image_url': image.image_url,
-        'image_alt': image.image_alt,
-        'is_primary': image.is_primary,
-        'display_order': image.display_order,
-        'created_at': image.created_at.isoformat()
-    })
+    return jsonify(serializers.image.obj(image))
 
 @app.route('/api/salons/<int:salon_id>/images/<int:image_id>', methods=['DELETE'])
 @require_auth
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+In-process snapshot of the services catalog.
+
+The catalog is a handful of rows that practically never change, yet the
+salon detail and service listings used to join ``services`` on every
+request. ``ServiceCatalog`` keeps an immutable snapshot (service id ->
+catalog row) and replaces it when the catalog version (newest
+``updated_at`` and row count) changes. The version is checked at most
+every CATALOG_CHECK_SECONDS, and the snapshot is rebuilt unconditionally
+after CATALOG_MAX_AGE seconds to also pick up edits made with raw SQL.
+
+Endpoints select ``salon_services.service_id`` and call ``join`` to splice
+the catalog columns in, which replaces the SQL join with dict lookups.
+"""
+
+import os
+import threading
+import time
+from types import MappingProxyType
+
+
+class CatalogSnapshot:
+    """Immutable catalog: ``rows`` in id order and ``by_id`` lookups"""
+
+    __slots__ = ('version', 'rows', 'by_id')
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = tuple(tuple(row) for row in rows)
+        self.by_id = MappingProxyType({row[0]: row for row in self.rows})
+
+
+class ServiceCatalog:
+    def __init__(self, load_rows, load_version, check_seconds=None, max_age=None):
+        """``load_rows`` returns the catalog rows (id first), ``load_version``
+        a cheap value that changes whenever the catalog does"""
+        self.load_rows = load_rows
+        self.load_version = load_version
+        self.check_seconds = check_seconds if check_seconds is not None else float(
+            os.getenv('CATALOG_CHECK_SECONDS', '5'))
+        self.max_age = max_age if max_age is not None else float(os.getenv('CATALOG_MAX_AGE', '300'))
+        self._snapshot = None
+        self._checked = 0
+        self._loaded = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self):
+        """Current snapshot, revalidated against the database when due"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked < self.check_seconds:
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and now - self._checked < self.check_seconds:
+                self.hits += 1
+                return snapshot
+            version = self.load_version()
+            if snapshot is None or version != snapshot.version or now - self._loaded >= self.max_age:
+                snapshot = self._snapshot = CatalogSnapshot(version, self.load_rows())
+                self._loaded = now
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._checked = now
+            return snapshot
+
+    @property
+    def version(self):
+        return self.get().version
+
+    def invalidate(self):
+        """Force a version check on the next access"""
+        self._checked = 0
+
+    def stats(self):
+        """Snapshot reuses (hits) and reloads (misses)"""
+        snapshot = self._snapshot
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(snapshot.rows) if snapshot else 0}
+
+    def join(self, rows, index=0):
+        """Replace the service id at ``index`` of each row with the catalog
+        row, dropping rows whose service does not exist (like an inner join)"""
+        snapshot = self.get()
+        by_id = snapshot.by_id
+        if any(row[index] not in by_id for row in rows):
+            # A service added since the last check, look again once
+            self.invalidate()
+            by_id = self.get().by_id
+        return [
+            tuple(row[:index]) + by_id[row[index]] + tuple(row[index + 1:])
+            for row in rows if row[index] in by_id
+        ]
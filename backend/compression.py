@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Negotiated response compression for large JSON payloads.
+
+Responses above ``COMPRESS_MIN_SIZE`` bytes are encoded with brotli (when
+the ``brotli`` package is installed and the client accepts ``br``) or
+gzip. Responses served from the response cache keep their compressed
+variants next to the cached body, so each variant is compressed once, at
+a higher level, instead of on every hit.
+
+The ETag is left untouched: http_cache.py issues weak ETags naming the
+JSON document whatever its encoding, and ``Vary: Accept-Encoding`` keeps
+shared caches from mixing encodings.
+"""
+
+import gzip
+import os
+
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/csv', 'application/x-ndjson', 'text/plain'}
+
+
+class CompressionSettings:
+    """Compression levels and thresholds, read from the environment"""
+
+    def __init__(self):
+        self.enabled = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+        self.min_size = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+        # Levels for responses compressed on every request
+        self.gzip_level = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+        self.brotli_quality = int(os.getenv('COMPRESS_BROTLI_QUALITY', '4'))
+        # Cached responses are compressed once, so they can afford more CPU
+        self.cached_gzip_level = int(os.getenv('COMPRESS_CACHED_GZIP_LEVEL', '9'))
+        self.cached_brotli_quality = int(os.getenv('COMPRESS_CACHED_BROTLI_QUALITY', '9'))
+
+
+def compress(data, encoding, level):
+    """Compress ``data`` with the given content coding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def negotiate_encoding(accept_encodings):
+    """Pick the best supported coding from an Accept-Encoding header"""
+    if brotli is not None and accept_encodings.quality('br') > 0:
+        return 'br'
+    if accept_encodings.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def init_compression(app, cache=None, settings=None):
+    """Register the compression after_request hook on ``app``.
+
+    ``cache`` is the ResponseCache whose entries should store their
+    compressed variants.
+    """
+    settings = settings or CompressionSettings()
+
+    @app.after_request
+    def compress_response(response):
+        if not settings.enabled or response.status_code != 200:
+            return response
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if (response.content_length or 0) < settings.min_size:
+            return response
+
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        entry = g.get('cached_response')
+        if entry is not None:
+            data = entry.encoded.get(encoding)
+            if data is None:
+                level = settings.cached_brotli_quality if encoding == 'br' else settings.cached_gzip_level
+                data = compress(entry.body, encoding, level)
+                if cache is not None:
+                    cache.add_variant(g.etag, entry, encoding, data)
+        else:
+            level = settings.brotli_quality if encoding == 'br' else settings.gzip_level
+            data = compress(response.get_data(), encoding, level)
+
+        if len(data) >= response.content_length:
+            return response
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return settings
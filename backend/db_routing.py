@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Read/write splitting between the primary database and read replicas.
+
+Set DATABASE_READ_URL to one or more comma separated replica URLs. Views
+decorated with ``ReplicaRouter.read_only`` run their SELECT statements on
+a replica picked round-robin per request; everything else, and any
+statement issued after the request has written, goes to the primary.
+
+A client that has just written (a successful POST/PUT/PATCH/DELETE) is
+kept on the primary for DB_PRIMARY_STICKY_SECONDS so managers see their
+own changes despite replication lag. Clients are identified by a cookie,
+which also works across workers when the frontend is served from the
+same site, and authenticated ones by their Authorization header in this
+process as well. Anonymous clients are not tracked by address: behind a
+proxy they would share one and a single booking would pin everyone to
+the primary.
+
+Without DATABASE_READ_URL every statement goes to the primary. For local
+testing two SQLite files work (see scripts/make_sqlite_replica.py).
+"""
+
+import itertools
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+
+STICKY_COOKIE = 'biosearch_primary_until'
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class RoutingSession(Session):
+    """Session sending SELECTs of read-only requests to the chosen replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context()
+                and getattr(clause, 'is_select', False)):
+            replica = g.get('db_replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    def __init__(self, urls=(), sticky_seconds=10, engine_options=None):
+        self.engines = [create_engine(url, **(engine_options or {})) for url in urls]
+        self.sticky_seconds = sticky_seconds
+        self._next = itertools.cycle(self.engines) if self.engines else None
+        self._sticky = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        urls = [url.strip() for url in os.getenv('DATABASE_READ_URL', '').split(',') if url.strip()]
+        return cls(
+            urls,
+            sticky_seconds=float(os.getenv('DB_PRIMARY_STICKY_SECONDS', '10')),
+            engine_options={'pool_pre_ping': True}
+        )
+
+    def named_engines(self):
+        return {f'replica{index}': engine for index, engine in enumerate(self.engines)}
+
+    def _client_key(self):
+        """Key of an authenticated client, None for anonymous ones"""
+        return request.headers.get('Authorization') or None
+
+    def _is_sticky(self):
+        now = time.time()
+        try:
+            if float(request.cookies.get(STICKY_COOKIE, 0)) > now:
+                return True
+        except ValueError:
+            pass
+        key = self._client_key()
+        return key is not None and self._sticky.get(key, 0) > now
+
+    def _choose(self):
+        with self._lock:
+            return next(self._next)
+
+    def read_only(self, f):
+        """Decorator for views whose reads may be served by a replica"""
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if self.engines and not self._is_sticky():
+                g.db_replica = self._choose()
+            return f(*args, **kwargs)
+        return decorated_function
+
+    def init_app(self, app, session):
+        app.extensions['db_replicas'] = self
+
+        @app.after_request
+        def stick_to_primary(response):
+            if not self.engines or request.method not in WRITE_METHODS or response.status_code >= 400:
+                return response
+            until = time.time() + self.sticky_seconds
+            key = self._client_key()
+            if key is not None:
+                with self._lock:
+                    if len(self._sticky) > 10000:
+                        now = time.time()
+                        self._sticky = {key: value for key, value in self._sticky.items() if value > now}
+                    self._sticky[key] = until
+            response.set_cookie(STICKY_COOKIE, f'{until:.0f}', max_age=int(self.sticky_seconds) + 1,
+                                httponly=True, samesite='Lax')
+            return response
+
+        @event.listens_for(session, 'after_flush')
+        def read_own_writes(session, flush_context):
+            # Reads after a write in the same request must see that write
+            if has_request_context():
+                g.pop('db_replica', None)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Address geocoding with Nominatim (OpenStreetMap) for the geocode_salon
+background job.
+
+Nominatim's usage policy allows one request per second and requires an
+identifying User-Agent; requests from this process are spaced by
+GEOCODER_MIN_INTERVAL seconds. Network and HTTP errors are raised so the
+job is retried.
+"""
+
+import os
+import threading
+import time
+
+import requests
+
+GEOCODER_URL = os.getenv('GEOCODER_URL', 'https://nominatim.openstreetmap.org/search')
+GEOCODER_USER_AGENT = os.getenv('GEOCODER_USER_AGENT', 'BioSearch/1.0')
+GEOCODER_MIN_INTERVAL = float(os.getenv('GEOCODER_MIN_INTERVAL', '1'))
+
+_lock = threading.Lock()
+_last_request = 0
+
+
+def geocode_address(address, country_code='pt'):
+    """(latitude, longitude) of an address, None when it is not found"""
+    global _last_request
+    with _lock:
+        wait = _last_request + GEOCODER_MIN_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request = time.monotonic()
+
+    response = requests.get(GEOCODER_URL, params={
+        'q': address,
+        'format': 'json',
+        'limit': 1,
+        'countrycodes': country_code
+    }, headers={'User-Agent': GEOCODER_USER_AGENT}, timeout=10)
+    response.raise_for_status()
+    results = response.json()
+    if not results:
+        return None
+    return float(results[0]['lat']), float(results[0]['lon'])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Conditional GET support for the public read endpoints.
+
+A view decorated with ``conditional`` provides a cheap version function.
+Its result, together with the request path and normalized query string,
+becomes an ETag that is checked against ``If-None-Match`` (and
+``If-Modified-Since``) before the view runs, so an unchanged resource
+costs one version lookup and an empty 304. The ETag is weak: it names the
+JSON document, which compression.py may send gzip, brotli or identity
+encoded, and those bodies are not byte-identical.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, g, request
+
+# Seconds a client may reuse a response without revalidating
+DEFAULT_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '0'))
+
+
+def normalized_query_string(args=None):
+    """Return the query arguments as a canonical, order-independent string"""
+    args = request.args if args is None else args
+    return '&'.join(
+        f'{key}={value}' for key in sorted(args) for value in sorted(args.getlist(key))
+    )
+
+
+def make_etag(*parts):
+    """Build an ETag value from the given version parts"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _last_modified(version):
+    """Pick the newest datetime contained in a version value, if any"""
+    values = version if isinstance(version, (tuple, list)) else (version,)
+    stamps = [value for value in values if isinstance(value, datetime)]
+    return max(stamps) if stamps else None
+
+
+def _apply_cache_headers(response, etag, last_modified, max_age):
+    response.set_etag(etag, weak=True)
+    # 304s too, caches keep one entry per content-coding
+    response.vary.add('Accept-Encoding')
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if not max_age:
+        response.cache_control.must_revalidate = True
+    return response
+
+
+def is_not_modified(etag, last_modified=None):
+    """Check the request's conditional headers against a resource version"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def conditional(version_func, max_age=None):
+    """Decorator adding ETag/Last-Modified validation to a GET view.
+
+    ``version_func`` receives the view arguments and returns a hashable
+    version for the resource, or ``None`` when it cannot tell (for
+    example a missing salon), in which case the view runs as usual.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version = version_func(*args, **kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+
+            age = DEFAULT_MAX_AGE if max_age is None else max_age
+            etag = make_etag(request.path, normalized_query_string(), version)
+            last_modified = _last_modified(version)
+            # Also used as the key of the server-side response cache
+            g.etag = etag
+
+            if is_not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+                return _apply_cache_headers(response, etag, last_modified, age)
+
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                _apply_cache_headers(response, etag, last_modified, age)
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Database-backed background jobs.
+
+Work that does not have to finish inside a request (geocoding a salon,
+recomputing statistics, ...) is registered with ``JobQueue.task`` and
+enqueued as a row of the jobs table, which ``backend/worker.py`` (the
+``worker`` process of the Procfile) picks up. ``enqueue`` only adds the
+row to the caller's session: the job is committed together with the
+request's own writes, and a request that rolls back never enqueues it.
+
+Workers poll for due jobs every JOB_POLL_SECONDS. On PostgreSQL a job is
+claimed with ``FOR UPDATE SKIP LOCKED``, so concurrent workers take
+different rows without waiting on each other. Other databases claim with
+a conditional UPDATE (still 'queued') and move on to the next candidate
+when another worker won the race, which SQLite's single writer makes safe.
+
+A failing job is retried up to ``max_attempts`` times with exponential
+backoff starting at JOB_RETRY_SECONDS. A job whose worker died stays
+'running' until JOB_LOCK_SECONDS pass and then counts as a failed
+attempt, so that timeout must exceed the longest job.
+
+``idempotency_key`` is unique: enqueueing a key that already exists
+returns the existing job instead of adding another, and a concurrent
+transaction enqueueing the same key fails with IntegrityError on commit.
+Periodic tasks use one key per period, so with several workers each run
+is enqueued once.
+Finished jobs are kept JOB_RETENTION_DAYS for inspection.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger('biosearch.jobs')
+
+STATUSES = ('queued', 'running', 'done', 'failed')
+
+# Candidates tried per claim when the database has no SKIP LOCKED
+CLAIM_CANDIDATES = 10
+
+# Longest wait between retries of a failing job
+MAX_RETRY_SECONDS = 3600
+
+
+class Task:
+    __slots__ = ('name', 'func', 'max_attempts', 'every')
+
+    def __init__(self, name, func, max_attempts, every):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.every = every
+
+
+class JobQueue:
+    def __init__(self, db, model, poll_seconds=None, retry_seconds=None, lock_seconds=None,
+                 max_attempts=None, retention_days=None):
+        """``model`` is the Job model, with the columns of app.Job"""
+        self.db = db
+        self.model = model
+        self.poll_seconds = poll_seconds if poll_seconds is not None else float(
+            os.getenv('JOB_POLL_SECONDS', '2'))
+        self.retry_seconds = retry_seconds if retry_seconds is not None else float(
+            os.getenv('JOB_RETRY_SECONDS', '30'))
+        self.lock_seconds = lock_seconds if lock_seconds is not None else float(
+            os.getenv('JOB_LOCK_SECONDS', '900'))
+        self.max_attempts = max_attempts if max_attempts is not None else int(
+            os.getenv('JOB_MAX_ATTEMPTS', '5'))
+        self.retention_days = retention_days if retention_days is not None else float(
+            os.getenv('JOB_RETENTION_DAYS', '7'))
+        self.tasks = {}
+        self._scheduled = {}
+        self._stop = threading.Event()
+
+    @property
+    def skip_locked(self):
+        return self.db.engine.dialect.name == 'postgresql'
+
+    # Producers
+
+    def task(self, name=None, max_attempts=None, every=None):
+        """Register the decorated function as a task, run as
+        ``func(**payload)``; ``every`` seconds makes it periodic"""
+        def register(func):
+            task_name = name or func.__name__
+            self.tasks[task_name] = Task(task_name, func, max_attempts or self.max_attempts, every)
+            return func
+        return register
+
+    def enqueue(self, name, payload=None, run_at=None, delay=None, idempotency_key=None, session=None):
+        """Add a job to ``session`` (the request's by default), to run at
+        ``run_at`` or after ``delay`` seconds. Returns the job, the existing
+        one when ``idempotency_key`` was already enqueued.
+
+        A transaction that enqueues the same key concurrently makes the
+        caller's flush or commit raise IntegrityError; no savepoint is used
+        since pysqlite commits it for good when it is the first write."""
+        task = self.tasks.get(name)
+        if task is None:
+            raise ValueError(f'Unknown task: {name}')
+        session = session or self.db.session
+        Job = self.model
+        if idempotency_key is not None:
+            existing = session.query(Job).filter_by(idempotency_key=idempotency_key).first()
+            if existing is not None:
+                return existing
+
+        now = datetime.utcnow()
+        job = Job(
+            name=name,
+            payload=payload or {},
+            status='queued',
+            attempts=0,
+            max_attempts=task.max_attempts,
+            run_at=run_at or now + timedelta(seconds=delay or 0),
+            idempotency_key=idempotency_key,
+            created_at=now
+        )
+        session.add(job)
+        return job
+
+    # Workers
+
+    def claim(self, worker_id):
+        """Mark the next due job as running for ``worker_id`` and return
+        it, None when no job is due"""
+        Job = self.model
+        session = self.db.session
+        now = datetime.utcnow()
+        due = session.query(Job.id).filter(Job.status == 'queued', Job.run_at <= now).order_by(Job.run_at, Job.id)
+        values = {'status': 'running', 'locked_by': worker_id, 'locked_at': now, 'attempts': Job.attempts + 1}
+
+        job_id = None
+        if self.skip_locked:
+            job_id = due.limit(1).with_for_update(skip_locked=True).scalar()
+            if job_id is not None:
+                session.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+        else:
+            for (candidate,) in due.limit(CLAIM_CANDIDATES).all():
+                claimed = session.query(Job).filter(
+                    Job.id == candidate, Job.status == 'queued'
+                ).update(values, synchronize_session=False)
+                if claimed:
+                    job_id = candidate
+                    break
+        if job_id is None:
+            session.rollback()
+            return None
+        session.commit()
+        return session.get(Job, job_id)
+
+    def backoff(self, attempts):
+        """Seconds before retrying a job that failed ``attempts`` times"""
+        return min(self.retry_seconds * 2 ** (attempts - 1), MAX_RETRY_SECONDS)
+
+    def run(self, job):
+        """Run a claimed job and record the outcome, True on success. The
+        job is marked done in the same transaction as the task's writes."""
+        session = self.db.session
+        Job = self.model
+        job_id, task = job.id, self.tasks.get(job.name)
+        started = time.perf_counter()
+        try:
+            if task is None:
+                raise LookupError(f'Unknown task: {job.name}')
+            task.func(**(job.payload or {}))
+        except Exception:
+            session.rollback()
+            job = session.get(Job, job_id)
+            job.last_error = traceback.format_exc()[-4000:]
+            job.locked_by = job.locked_at = None
+            if task is not None and job.attempts < job.max_attempts:
+                job.status = 'queued'
+                job.run_at = datetime.utcnow() + timedelta(seconds=self.backoff(job.attempts))
+            else:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+            logger.exception('Job %s (%s) failed, attempt %s/%s', job_id, job.name, job.attempts, job.max_attempts)
+            session.commit()
+            return False
+
+        job = session.get(Job, job_id)
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.locked_by = job.locked_at = None
+        session.commit()
+        logger.info('Job %s (%s) done in %.3fs', job_id, job.name, time.perf_counter() - started)
+        return True
+
+    def release_stale(self):
+        """Requeue, or fail after their last attempt, jobs whose worker
+        stopped before finishing them"""
+        Job = self.model
+        session = self.db.session
+        now = datetime.utcnow()
+        retry = Job.attempts < Job.max_attempts
+        count = session.query(Job).filter(
+            Job.status == 'running',
+            Job.locked_at < now - timedelta(seconds=self.lock_seconds)
+        ).update({
+            'status': self.db.case((retry, 'queued'), else_='failed'),
+            'finished_at': self.db.case((retry, None), else_=now),
+            'run_at': now,
+            'locked_by': None,
+            'locked_at': None,
+            'last_error': 'Lock expired, the worker stopped before finishing the job'
+        }, synchronize_session=False)
+        session.commit()
+        if count:
+            logger.warning('Released %s stale jobs', count)
+        return count
+
+    def schedule_periodic(self):
+        """Enqueue the current run of each periodic task"""
+        now = time.time()
+        for task in self.tasks.values():
+            if not task.every:
+                continue
+            period = int(now // task.every)
+            if self._scheduled.get(task.name) == period:
+                continue
+            self.enqueue(task.name, run_at=datetime.utcfromtimestamp(period * task.every),
+                         idempotency_key=f'{task.name}@{period}')
+            try:
+                self.db.session.commit()
+            except IntegrityError:
+                # Another worker enqueued this run first
+                self.db.session.rollback()
+            self._scheduled[task.name] = period
+
+    def purge(self):
+        """Delete jobs finished more than JOB_RETENTION_DAYS ago"""
+        Job = self.model
+        session = self.db.session
+        count = session.query(Job).filter(
+            Job.status.in_(('done', 'failed')),
+            Job.finished_at < datetime.utcnow() - timedelta(days=self.retention_days)
+        ).delete(synchronize_session=False)
+        session.commit()
+        return count
+
+    def work(self, worker_id=None, burst=False):
+        """Run due jobs until ``stop()`` is called, or with ``burst`` until
+        none is due. Returns the number of jobs run."""
+        worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self._stop.clear()
+        housekeeping = None
+        processed = 0
+        while not self._stop.is_set():
+            if housekeeping is None or time.monotonic() - housekeeping >= 60:
+                self.release_stale()
+                self.purge()
+                housekeeping = time.monotonic()
+            self.schedule_periodic()
+            job = self.claim(worker_id)
+            if job is None:
+                if burst:
+                    break
+                self._stop.wait(self.poll_seconds)
+                continue
+            self.run(job)
+            processed += 1
+        return processed
+
+    def stop(self):
+        """Make ``work`` return after the current job"""
+        self._stop.set()
+
+    # Admin
+
+    def retry(self, job):
+        """Queue a failed job again with a fresh set of attempts"""
+        job.status = 'queued'
+        job.attempts = 0
+        job.run_at = datetime.utcnow()
+        job.finished_at = None
+
+    def stats(self):
+        Job = self.model
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self.db.session.query(Job.status, self.db.func.count(Job.id)).group_by(Job.status).all())
+        return counts
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Prometheus-style metrics for the BioSearch backend.
+
+Request counts, latency histograms, error counts and SQL statements per
+route are collected in after_request hooks with a single lock and a few
+dict updates, cheap enough to run on every request. DB pool usage and
+cache statistics are read when ``/metrics`` is scraped.
+
+Metrics are per process: with several gunicorn workers each scrape sees
+the worker that served it (see biosearch_process_start_time_seconds for
+its pid).
+"""
+
+import bisect
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def inc(self, label_values=(), amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        # label values -> [count per bucket..., count above last bucket, sum, count]
+        self.values = {}
+
+    def observe(self, value, label_values=()):
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [0] * (len(self.buckets) + 3)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        bucket_labels = self.labels + ('le',)
+        for label_values, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(bucket_labels, label_values + (_format_value(float(bound)),))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(bucket_labels, label_values + ("+Inf",))} {series[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, label_values)} {_format_value(series[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, label_values)} {series[-1]}')
+        return lines
+
+
+def _gauge(name, help_text, samples, labels=()):
+    """Render a gauge from (label values, value) samples read at scrape time"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+    for label_values, value in samples:
+        lines.append(f'{name}{_format_labels(labels, label_values)} {_format_value(value)}')
+    return lines
+
+
+class Metrics:
+    """Request metrics registry plus scrape-time collectors"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = Counter('biosearch_http_requests_total', 'HTTP requests served',
+                                ('method', 'route', 'status'))
+        self.errors = Counter('biosearch_http_errors_total', 'HTTP responses with status >= 500',
+                              ('method', 'route'))
+        self.latency = Histogram('biosearch_http_request_duration_seconds', 'Request latency',
+                                 LATENCY_BUCKETS, ('method', 'route'))
+        self.queries = Histogram('biosearch_db_queries_per_request', 'SQL statements per request',
+                                 QUERY_BUCKETS, ('route',))
+        self.db_time = Counter('biosearch_db_time_seconds_total', 'Time spent in SQL statements',
+                               ('route',))
+        self.collectors = []
+
+    def observe_request(self, method, route, status, seconds, query_count=None, db_seconds=None):
+        with self.lock:
+            self.requests.inc((method, route, str(status)))
+            if status >= 500:
+                self.errors.inc((method, route))
+            self.latency.observe(seconds, (method, route))
+            if query_count is not None:
+                self.queries.observe(query_count, (route,))
+                self.db_time.inc((route,), db_seconds)
+
+    def add_collector(self, collector):
+        """Register a callable returning extra exposition lines at scrape time"""
+        self.collectors.append(collector)
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for metric in (self.requests, self.errors, self.latency, self.queries, self.db_time):
+                lines.extend(metric.render())
+        lines.extend(_gauge('biosearch_process_start_time_seconds', 'Process start time',
+                            [((os.getpid(),), self.started)], ('pid',)))
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+def pool_collector(engines):
+    """Collector for connection pool usage; ``engines`` returns {name: engine}"""
+    def collect():
+        samples = {'size': [], 'checked_out': [], 'overflow': []}
+        for name, engine in engines().items():
+            pool = engine.pool
+            for key, method in (('size', 'size'), ('checked_out', 'checkedout'), ('overflow', 'overflow')):
+                if hasattr(pool, method):
+                    # QueuePool reports negative overflow until the pool is full
+                    samples[key].append(((name,), max(getattr(pool, method)(), 0)))
+        lines = []
+        lines += _gauge('biosearch_db_pool_size', 'Configured pool size', samples['size'], ('engine',))
+        lines += _gauge('biosearch_db_pool_checked_out', 'Connections in use', samples['checked_out'], ('engine',))
+        lines += _gauge('biosearch_db_pool_overflow', 'Connections above pool size', samples['overflow'], ('engine',))
+        return lines
+    return collect
+
+
+def cache_collector(caches):
+    """Collector for in-process caches; ``caches`` maps a name to a stats()
+    callable returning hits/misses/entries/bytes"""
+    def collect():
+        stats = {name: func() for name, func in caches.items()}
+        lines = []
+        for key, kind, help_text in (
+            ('hits', 'counter', 'Cache hits'),
+            ('misses', 'counter', 'Cache misses'),
+            ('entries', 'gauge', 'Entries held in the cache'),
+            ('bytes', 'gauge', 'Approximate bytes held in the cache'),
+        ):
+            name = f'biosearch_cache_{key}' + ('_total' if kind == 'counter' else '')
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for cache_name, values in sorted(stats.items()):
+                if key in values:
+                    lines.append(f'{name}{_format_labels(("cache",), (cache_name,))} {_format_value(values[key])}')
+        return lines
+    return collect
+
+
+def init_metrics(app, engines, caches=None):
+    """Collect request metrics on ``app`` and expose them at /metrics.
+
+    Set METRICS_TOKEN to require ``Authorization: Bearer <token>`` on scrapes.
+    """
+    metrics = Metrics()
+    metrics.add_collector(pool_collector(engines))
+    if caches:
+        metrics.add_collector(cache_collector(caches))
+    token = os.getenv('METRICS_TOKEN')
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        stats = g.get('query_stats')
+        metrics.observe_request(
+            request.method, route, response.status_code, time.perf_counter() - started,
+            stats.count if stats is not None else None,
+            stats.total_time if stats is not None else None
+        )
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
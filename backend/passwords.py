@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Password hashing with scrypt.
+
+Hashes are stored as ``scrypt$<n>$<r>$<p>$<salt>$<hash>`` so the cost
+parameters can be raised later (PASSWORD_SCRYPT_N/R/P) without breaking
+existing hashes: ``needs_rehash`` reports hashes made with other
+parameters, and the legacy single-round SHA-256 ``salt:hash`` format, so
+login can upgrade them transparently.
+
+scrypt is deliberately expensive in CPU and memory, so hashing and
+verification run in a small bounded thread pool (PASSWORD_HASH_WORKERS).
+At most PASSWORD_HASH_QUEUE operations may wait for it; beyond that
+``PasswordHasherBusy`` is raised so a burst of logins is rejected quickly
+instead of tying up every request thread.
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SCRYPT_N = int(os.getenv('PASSWORD_SCRYPT_N', str(2 ** 15)))
+SCRYPT_R = int(os.getenv('PASSWORD_SCRYPT_R', '8'))
+SCRYPT_P = int(os.getenv('PASSWORD_SCRYPT_P', '1'))
+KEY_LENGTH = 32
+
+_workers = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+_executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix='password-hash')
+_slots = threading.BoundedSemaphore(_workers + int(os.getenv('PASSWORD_HASH_QUEUE', '32')))
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hash operations are already running or queued"""
+
+
+def _scrypt(password, salt, n, r, p):
+    # OpenSSL's default 32 MiB limit is too small for larger n
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=128 * n * r * p + 2 ** 20, dklen=KEY_LENGTH)
+
+
+def _hash(password):
+    salt = secrets.token_bytes(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f'scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}'
+
+
+def _verify(password, stored_hash):
+    try:
+        if stored_hash.startswith('scrypt$'):
+            _, n, r, p, salt, digest = stored_hash.split('$')
+            computed = _scrypt(password, bytes.fromhex(salt), int(n), int(r), int(p))
+            return hmac.compare_digest(computed, bytes.fromhex(digest))
+        # Legacy format: single round of SHA-256 over password + salt
+        salt, digest = stored_hash.split(':')
+        computed = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(computed, digest)
+    except (AttributeError, ValueError):
+        return False
+
+
+def _run(func, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return _executor.submit(func, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    """Hash a password with scrypt at the configured cost"""
+    return _run(_hash, password)
+
+
+def verify_password(password, stored_hash):
+    """Verify a password against a scrypt or legacy SHA-256 hash"""
+    return _run(_verify, password, stored_hash)
+
+
+def needs_rehash(stored_hash):
+    """Whether the hash uses the legacy format or other cost parameters"""
+    prefix = f'scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$'
+    return not (stored_hash or '').startswith(prefix)
+
+
+# Verified when the email is unknown so the response time does not reveal it
+DUMMY_HASH = _hash(secrets.token_hex(16))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Opt-in request profiling.
+
+A request is profiled with cProfile when an admin sends the profiling
+header (``X-Profile: 1`` by default) or when it is picked by 1-in-N
+sampling (PROFILE_SAMPLE_RATE=N, off by default). Profiles are kept in a
+bounded in-memory store together with the request's SQL statement count
+and DB time, so view/serialization cost can be told apart from database
+cost, and are served from the admin profile endpoints.
+
+When no request is being profiled the per-request cost is one header
+lookup and a counter increment. Only one request per process is profiled
+at a time; requests arriving meanwhile are served normally.
+"""
+
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import g, request
+
+
+class ProfileRecord:
+    __slots__ = ('id', 'method', 'path', 'endpoint', 'status', 'trigger', 'duration_ms',
+                 'queries', 'db_ms', 'created_at', 'stats')
+
+    def __init__(self, id, method, path, endpoint, status, trigger, duration_ms, queries, db_ms, stats):
+        self.id = id
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.status = status
+        self.trigger = trigger
+        self.duration_ms = duration_ms
+        self.queries = queries
+        self.db_ms = db_ms
+        self.created_at = datetime.utcnow()
+        self.stats = stats
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'endpoint': self.endpoint,
+            'status': self.status,
+            'trigger': self.trigger,
+            'duration_ms': self.duration_ms,
+            'queries': self.queries,
+            'db_ms': self.db_ms,
+            'created_at': self.created_at.isoformat()
+        }
+
+    def pstats_bytes(self):
+        """The profile in the format written by ``cProfile.Profile.dump_stats``"""
+        return marshal.dumps(self.stats)
+
+    def text(self, sort='cumulative', limit=40):
+        """pstats report of the ``limit`` most expensive functions"""
+        output = io.StringIO()
+        report = pstats.Stats(_StatsSource(self.stats), stream=output)
+        report.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+class _StatsSource:
+    """Adapter letting pstats.Stats load an already collected stats dict"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfileStore:
+    """Most recent profiles, oldest evicted first"""
+
+    def __init__(self, limit=50):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.records = OrderedDict()
+        self.ids = itertools.count(1)
+
+    def add(self, **fields):
+        with self.lock:
+            record = ProfileRecord(id=next(self.ids), **fields)
+            self.records[record.id] = record
+            while len(self.records) > self.limit:
+                self.records.popitem(last=False)
+            return record
+
+    def get(self, profile_id):
+        with self.lock:
+            return self.records.get(profile_id)
+
+    def list(self):
+        with self.lock:
+            return [record.to_dict() for record in reversed(self.records.values())]
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+
+class Profiler:
+    def __init__(self, store, sample_rate=0, header='X-Profile', min_ms=0):
+        self.store = store
+        self.sample_rate = sample_rate
+        self.header = header
+        self.min_ms = min_ms
+        self.counter = itertools.count(1)
+        # cProfile allows a single active profiler on recent Pythons
+        self.busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ProfileStore(int(os.getenv('PROFILE_STORE_SIZE', '50'))),
+            sample_rate=int(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+            header=os.getenv('PROFILE_HEADER', 'X-Profile'),
+            min_ms=float(os.getenv('PROFILE_MIN_MS', '0'))
+        )
+
+    def trigger(self, is_admin):
+        """Why the current request should be profiled, or None"""
+        if request.headers.get(self.header) and is_admin():
+            return 'header'
+        if self.sample_rate and next(self.counter) % self.sample_rate == 0:
+            return 'sample'
+        return None
+
+
+def init_profiling(app, is_admin):
+    """Profile selected requests on ``app``.
+
+    ``is_admin`` is called only for requests carrying the profiling header
+    and must return True when the request is authenticated as an admin.
+    """
+    profiler = Profiler.from_env()
+
+    @app.before_request
+    def start_profile():
+        trigger = profiler.trigger(is_admin)
+        if trigger is None or not profiler.busy.acquire(blocking=False):
+            return
+        g.profile = (cProfile.Profile(), trigger, time.perf_counter())
+        g.profile[0].enable()
+
+    @app.after_request
+    def store_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        profile_obj, trigger, started = profile
+        profile_obj.disable()
+        profiler.busy.release()
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        # Sampled requests below the threshold are not worth keeping
+        if trigger == 'sample' and duration_ms < profiler.min_ms:
+            return response
+        profile_obj.create_stats()
+        stats = g.get('query_stats')
+        record = profiler.store.add(
+            method=request.method,
+            path=request.full_path.rstrip('?'),
+            endpoint=request.endpoint,
+            status=response.status_code,
+            trigger=trigger,
+            duration_ms=duration_ms,
+            queries=stats.count if stats is not None else None,
+            db_ms=round(stats.total_time * 1000, 2) if stats is not None else None,
+            stats=profile_obj.stats
+        )
+        response.headers['X-Profile-Id'] = str(record.id)
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc):
+        # Requests that never reached after_request must not leave the profiler on
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile[0].disable()
+            profiler.busy.release()
+
+    return profiler
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Per-request SQL instrumentation.
+
+Every statement executed through any SQLAlchemy engine is timed with the
+``before_cursor_execute``/``after_cursor_execute`` events and charged to
+the current request. After the request the totals are sent as
+``X-Query-Count``/``X-DB-Time-Ms`` headers (debug mode, or when
+QUERY_STATS_HEADERS=true) and written as one structured log line. Requests
+issuing more than QUERY_BUDGET statements are logged as warnings.
+
+The ``biosearch.queries`` logger writes those JSON lines to stderr at
+QUERY_LOG_LEVEL (INFO by default, WARNING keeps only over-budget
+requests), so they reach the gunicorn/Render logs without any logging
+setup in the app.
+
+Tests can bound the statements a block of code issues with
+``assert_max_queries``::
+
+    with assert_max_queries(3):
+        client.get('/api/salons')
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('biosearch.queries')
+
+_captures = threading.local()
+
+
+class QueryStats:
+    """Statement count, total DB time and the slowest statements"""
+
+    __slots__ = ('count', 'total_time', 'slowest', 'keep')
+
+    def __init__(self, keep=3):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest = []
+        self.keep = keep
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total_time += duration
+        item = (duration, statement)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, item)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def slowest_statements(self):
+        return [
+            {'ms': round(duration * 1000, 2), 'statement': ' '.join(statement.split())[:500]}
+            for duration, statement in sorted(self.slowest, reverse=True)
+        ]
+
+
+def _active_stats():
+    stats = list(getattr(_captures, 'stack', ()))
+    if has_request_context():
+        request_stats = g.get('query_stats')
+        if request_stats is not None:
+            stats.append(request_stats)
+    return stats
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start_time'].pop()
+    for stats in _active_stats():
+        stats.record(statement, duration)
+
+
+@contextmanager
+def capture_queries():
+    """Collect QueryStats for the statements issued inside the block"""
+    stats = QueryStats()
+    stack = getattr(_captures, 'stack', None)
+    if stack is None:
+        stack = _captures.stack = []
+    stack.append(stats)
+    try:
+        yield stats
+    finally:
+        stack.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail if the block issues more than ``limit`` SQL statements"""
+    with capture_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        raise AssertionError(
+            f'{stats.count} queries executed, expected at most {limit}. '
+            f'Slowest: {stats.slowest_statements()}'
+        )
+
+
+def init_query_stats(app):
+    """Attach per-request query accounting to ``app``"""
+    budget = int(os.getenv('QUERY_BUDGET', '20'))
+    slow_ms = float(os.getenv('SLOW_QUERY_MS', '100'))
+    # Headers default to debug mode only, QUERY_STATS_HEADERS forces them on/off
+    headers = os.getenv('QUERY_STATS_HEADERS')
+
+    logger.setLevel(os.getenv('QUERY_LOG_LEVEL', 'INFO').upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        # The records are complete JSON lines, keep them out of root handlers
+        logger.propagate = False
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+
+        db_ms = round(stats.total_time * 1000, 2)
+        if app.debug if headers is None else headers.lower() == 'true':
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-Ms'] = str(db_ms)
+
+        over_budget = stats.count > budget
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': db_ms,
+            'over_budget': over_budget
+        }
+        slowest_ms = max(stats.slowest)[0] * 1000 if stats.slowest else 0
+        if over_budget or slowest_ms >= slow_ms:
+            record['slowest'] = stats.slowest_statements()
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record))
+        return response
+
+    return budget
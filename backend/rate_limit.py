@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiting for the unauthenticated write endpoints.
+
+Each limited view declares its rules as ``"<count>/<period>"`` strings
+keyed by client IP and/or a field of the JSON body (email, customer_id,
+...). A rule allows bursts of ``count`` requests and refills at
+``count`` per ``period``. Limits are checked in the view decorator before
+the view runs, so a rejected request costs a dict update (or one Redis
+round trip) and no database work; it gets 429 with ``Retry-After``.
+
+Rules can be overridden per deployment with RATE_LIMIT_<NAME>_<KEY>, e.g.
+RATE_LIMIT_LOGIN_EMAIL=20/hour. Buckets live in the process by default;
+RATE_LIMIT_URL=redis://... shares them between workers and
+``memory://`` selects the in-process stand-in for the shared backend.
+If the shared backend fails, requests are allowed.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify, request
+
+logger = logging.getLogger('biosearch.rate_limit')
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rule(spec):
+    """'10/minute' -> (capacity, refill rate per second)"""
+    count, _, period = spec.partition('/')
+    count = int(count)
+    return count, count / PERIODS[period.strip().lower()]
+
+
+class MemoryBackend:
+    """Token buckets held in this process, bounded to ``max_keys``"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now=None):
+        """Take one token, returns (allowed, seconds until one is available)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return allowed, retry_after
+
+    def _prune(self, now):
+        # A bucket untouched for a minute or more is usually full again,
+        # forgetting it is equivalent; drop everything if that is not enough
+        stale = [key for key, (_, stamp) in self._buckets.items() if now - stamp > 60]
+        for key in stale:
+            del self._buckets[key]
+        if len(self._buckets) > self.max_keys:
+            self._buckets.clear()
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class MemorySharedBackend(MemoryBackend):
+    """In-process stand-in for a shared backend (tests, single worker).
+
+    Uses wall-clock time like the Redis backend, whose buckets are shared
+    by processes that do not share a monotonic clock.
+    """
+
+    def take(self, key, capacity, rate, now=None):
+        return super().take(key, capacity, rate, time.time() if now is None else now)
+
+
+class RedisBackend:
+    """Shared buckets in Redis, updated atomically by a Lua script"""
+
+    SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or capacity
+local stamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+    def __init__(self, url, prefix='biosearch:ratelimit:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+        self._prefix = prefix
+
+    def take(self, key, capacity, rate, now=None):
+        allowed, retry_after = self._script(keys=[self._prefix + key],
+                                            args=[capacity, rate, time.time() if now is None else now])
+        return bool(allowed), float(retry_after)
+
+    def clear(self):
+        for key in self._redis.scan_iter(self._prefix + '*'):
+            self._redis.delete(key)
+
+
+class RateLimiter:
+    def __init__(self, backend=None, enabled=True):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.enabled = enabled
+        self.limited = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build the limiter from RATE_LIMIT_* environment variables"""
+        url = os.getenv('RATE_LIMIT_URL')
+        if url == 'memory://':
+            backend = MemorySharedBackend()
+        elif url:
+            backend = RedisBackend(url)
+        else:
+            backend = MemoryBackend()
+        return cls(
+            backend,
+            enabled=os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+        )
+
+    def client_ip(self):
+        # The real client behind PROXY_HOPS trusted proxies, see app.py
+        return request.remote_addr or 'unknown'
+
+    def _key_value(self, key):
+        if key == 'ip':
+            return self.client_ip()
+        data = request.get_json(silent=True)
+        value = data.get(key) if isinstance(data, dict) else None
+        return str(value).strip().lower() if value else None
+
+    def check(self, name, rules):
+        """Take a token from every bucket of ``rules``, returns the longest
+        Retry-After in seconds or None when the request is allowed"""
+        retry_after = None
+        for key, (capacity, rate) in rules.items():
+            value = self._key_value(key)
+            if value is None:
+                continue
+            try:
+                allowed, wait = self.backend.take(f'{name}:{key}:{value}', capacity, rate)
+            except Exception:
+                logger.exception('Rate limit backend failed, allowing request')
+                continue
+            if not allowed:
+                retry_after = max(retry_after or 0, wait)
+        return retry_after
+
+    def limit(self, name, **rules):
+        """Decorator limiting a view, e.g. ``limit('login', ip='30/minute', email='10/minute')``"""
+        parsed = {
+            key: parse_rule(os.getenv(f'RATE_LIMIT_{name}_{key}'.upper(), spec))
+            for key, spec in rules.items()
+        }
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if self.enabled:
+                    retry_after = self.check(name, parsed)
+                    if retry_after is not None:
+                        self.limited += 1
+                        response = jsonify({'error': 'Too many requests, please try again later'})
+                        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                        return response, 429
+                return f(*args, **kwargs)
+            return decorated_function
+        return decorator
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Server-side response cache for the anonymous public endpoints.
+
+Entries are keyed by the resource ETag computed by ``http_cache.conditional``
+(request path + normalized query string + data version), so a worker can
+never serve a response built from older data than the database holds.
+Entries are also tagged (``salon:<id>``, ``salons``) and dropped as soon as
+a write to that salon commits, which keeps memory for live data. Local
+entries also expire after RESPONSE_CACHE_TTL seconds, like shared ones:
+the listing version is derived from ``updated_at`` values written by the
+app hosts, and a transaction committing after a newer value was read does
+not change it.
+
+Lookups go to a process-local LRU first and then, when configured, to a
+shared backend used by all workers. ``MemorySharedBackend`` implements the
+shared backend contract in-process for tests and single-worker setups;
+``RedisBackend`` is used when ``RESPONSE_CACHE_URL`` points to Redis.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g
+
+
+class CachedResponse:
+    """A cached response body; ``encoded`` holds compressed variants"""
+
+    __slots__ = ('body', 'mimetype', 'encoded')
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.encoded = {}
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+    def dumps(self):
+        return self.mimetype.encode() + b'\n' + self.body
+
+    @classmethod
+    def loads(cls, data):
+        mimetype, _, body = data.partition(b'\n')
+        return cls(body, mimetype.decode())
+
+
+class LocalLRU:
+    """Thread-safe LRU bounded by entry count and total body bytes, whose
+    entries expire after ``ttl`` seconds (never when None)"""
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[2] is not None and item[2] < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key, entry, tags=()):
+        with self._lock:
+            self._remove(key)
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (entry, tuple(tags), expires)
+            self._bytes += entry.size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def add_variant(self, key, entry, encoding, data):
+        """Attach a compressed variant to a stored entry"""
+        with self._lock:
+            if encoding in entry.encoded:
+                return
+            entry.encoded[encoding] = data
+            if self._entries.get(key, (None,))[0] is entry:
+                self._bytes += len(data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        item = self._entries.pop(key, None)
+        if item is None:
+            return
+        entry, tags, _ = item
+        self._bytes -= entry.size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+
+class MemorySharedBackend:
+    """In-process stand-in for a shared backend (tests, single worker)"""
+
+    def __init__(self):
+        self._data = {}
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl, tags=()):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+
+class RedisBackend:
+    """Shared backend storing entries and tag sets in Redis"""
+
+    def __init__(self, url, prefix='biosearch:cache:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        return self._redis.get(self._prefix + key)
+
+    def set(self, key, value, ttl, tags=()):
+        pipe = self._redis.pipeline()
+        pipe.set(self._prefix + key, value, ex=ttl)
+        for tag in tags:
+            pipe.sadd(self._prefix + 'tag:' + tag, key)
+            pipe.expire(self._prefix + 'tag:' + tag, ttl)
+        pipe.execute()
+
+    def invalidate(self, tags):
+        for tag in tags:
+            tag_key = self._prefix + 'tag:' + tag
+            keys = self._redis.smembers(tag_key)
+            pipe = self._redis.pipeline()
+            for key in keys:
+                pipe.delete(self._prefix + key.decode())
+            pipe.delete(tag_key)
+            pipe.execute()
+
+    def clear(self):
+        for key in self._redis.scan_iter(self._prefix + '*'):
+            self._redis.delete(key)
+
+
+class ResponseCache:
+    """Two-level response cache with tag based invalidation"""
+
+    def __init__(self, local=None, shared=None, ttl=300, enabled=True):
+        self.local = local if local is not None else LocalLRU()
+        self.shared = shared
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from RESPONSE_CACHE_* environment variables"""
+        url = os.getenv('RESPONSE_CACHE_URL')
+        if url == 'memory://':
+            shared = MemorySharedBackend()
+        elif url:
+            shared = RedisBackend(url)
+        else:
+            shared = None
+        ttl = int(os.getenv('RESPONSE_CACHE_TTL', '300'))
+        return cls(
+            local=LocalLRU(
+                max_entries=int(os.getenv('RESPONSE_CACHE_ENTRIES', '512')),
+                max_bytes=int(os.getenv('RESPONSE_CACHE_BYTES', str(32 * 1024 * 1024))),
+                ttl=ttl
+            ),
+            shared=shared,
+            ttl=ttl,
+            enabled=os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+        )
+
+    def get(self, key):
+        entry = self.local.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        if self.shared is not None:
+            data = self.shared.get(key)
+            if data is not None:
+                entry = CachedResponse.loads(data)
+                # Untagged locally; still safe since the key embeds the data version
+                self.local.set(key, entry)
+                self.shared_hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def set(self, key, entry, tags=()):
+        self.local.set(key, entry, tags)
+        if self.shared is not None:
+            self.shared.set(key, entry.dumps(), self.ttl, tags)
+
+    def invalidate(self, tags):
+        """Drop every entry carrying one of ``tags``"""
+        tags = list(tags)
+        if not tags:
+            return
+        self.invalidations += 1
+        self.local.invalidate(tags)
+        if self.shared is not None:
+            self.shared.invalidate(tags)
+
+    def add_variant(self, key, entry, encoding, data):
+        """Keep a compressed variant of a cached entry (local level only)"""
+        self.local.add_variant(key, entry, encoding, data)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_ratio': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            'entries': len(self.local),
+            'bytes': self.local.bytes,
+            'evictions': self.local.evictions,
+            'invalidations': self.invalidations,
+            'shared_backend': type(self.shared).__name__ if self.shared is not None else None
+        }
+
+    def cached(self, tags):
+        """Decorator caching a view's 200 responses under the request ETag.
+
+        Must sit below ``http_cache.conditional``, which computes the ETag.
+        ``tags`` receives the view arguments and returns the entry's tags.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                key = g.get('etag')
+                if not self.enabled or key is None:
+                    return f(*args, **kwargs)
+
+                entry = self.get(key)
+                if entry is None:
+                    response = current_app.make_response(f(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        return response
+                    entry = CachedResponse(response.get_data(), response.mimetype)
+                    self.set(key, entry, tags(*args, **kwargs))
+                    g.cached_response = entry
+                    return response
+
+                g.cached_response = entry
+                return current_app.response_class(entry.body, mimetype=entry.mimetype)
+            return decorated_function
+        return decorator
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+In-memory inverted index over salons for facet counts.
+
+Every salon gets a dense position; each facet value (city, region, BIO
+Diamond flag, booking flag, offered service category) maps to a bitset,
+stored as a Python int with bit ``position`` set for the salons having
+that value. The listing filters become bitsets too, so a facet count is
+``(filters & value_bits).bit_count()``. Facets are disjunctive: the counts
+of one facet ignore the filter on that same facet, so a client filtering
+on Porto still sees how many salons the other cities have.
+
+Offered services are kept as posting lists, service id -> {salon
+position: (price, duration)}, so the service, category, price and
+duration filters of the listing turn into a bitset with one pass over the
+postings of the requested services.
+
+The index is kept current incrementally. At most every
+SALON_INDEX_CHECK_SECONDS it reloads salons whose ``updated_at`` is at or
+after the newest value it has seen (child writes bump ``updated_at``, see
+app.py) and re-indexes just those; a changed salon count, or a very large
+batch of changes, triggers a full rebuild. Commits in this process mark
+the index stale right away. A transaction committing after a newer
+``updated_at`` was indexed is missed by the watermark, so the index is
+also rebuilt unconditionally after SALON_INDEX_MAX_AGE seconds.
+
+The same index answers type-ahead suggestions: a sorted array of
+(normalized term, salon id) pairs, one per word start of each active
+salon's name, searched with bisect. Names are normalized to lowercase
+without accents so "evora" finds "Évora".
+"""
+
+import bisect
+import os
+import threading
+import time
+import unicodedata
+
+FACETS = ('cidade', 'regiao', 'is_bio_diamond', 'booking_enabled', 'category')
+
+# Rebuild instead of patching when more salons than this changed at once
+MAX_INCREMENTAL = 5000
+
+
+def normalize(text):
+    """Lowercase, accent-free, single-spaced form used for matching"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ' '.join(''.join(char for char in decomposed if not unicodedata.combining(char)).lower().split())
+
+
+def name_terms(name):
+    """Every suffix of the normalized name starting at a word, so a prefix
+    search matches any word of the name"""
+    words = normalize(name).split(' ')
+    return [' '.join(words[index:]) for index in range(len(words)) if words[index]]
+
+
+def bits_from_positions(positions, size):
+    """Bitset with the given positions set"""
+    buffer = bytearray(size // 8 + 1)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class SalonIndex:
+    def __init__(self, load_salons, load_offers, load_state, check_seconds=None, max_age=None):
+        """``load_salons(since)`` returns (id, nome, cidade, regiao, estado,
+        is_bio_diamond, booking_enabled, updated_at) rows, all of them when
+        ``since`` is None; ``load_offers(salon_ids)`` returns (salon_id,
+        service_id, category, price, duration) rows, for every salon when
+        ``salon_ids`` is None; ``load_state()`` returns (newest updated_at, salon count,
+        generation) where a change of ``generation`` (e.g. the services
+        catalog version) requires a full rebuild."""
+        self.load_salons = load_salons
+        self.load_offers = load_offers
+        self.load_state = load_state
+        self.check_seconds = check_seconds if check_seconds is not None else float(
+            os.getenv('SALON_INDEX_CHECK_SECONDS', '5'))
+        self.max_age = max_age if max_age is not None else float(os.getenv('SALON_INDEX_MAX_AGE', '600'))
+        self._lock = threading.RLock()
+        self._checked = 0
+        self._rebuilt = 0
+        self.hits = 0
+        self.misses = 0
+        # Normalized terms of city/region values, they repeat across salons
+        self._place_terms = {}
+        self._reset()
+
+    def _reset(self):
+        self.positions = {}
+        self.ids = []
+        self.names = []
+        self.labels = []
+        self.terms = []
+        self.values = []
+        self.active = 0
+        self.bitsets = {facet: {} for facet in FACETS}
+        self.postings = {}
+        self.watermark = None
+        self.generation = None
+        # Sorted (term, salon id) pairs for suggestions, and each salon's terms
+        self.suggestions = []
+        self.salon_terms = {}
+        self.salon_services = {}
+        self.service_categories = {}
+        self._bulk = False
+
+    # Maintenance
+
+    def _set_bit(self, facet, value, position):
+        bitsets = self.bitsets[facet]
+        bitsets[value] = bitsets.get(value, 0) | (1 << position)
+
+    def _clear_bit(self, facet, value, position):
+        bitsets = self.bitsets[facet]
+        bits = bitsets.get(value, 0) & ~(1 << position)
+        if bits:
+            bitsets[value] = bits
+        else:
+            bitsets.pop(value, None)
+
+    def _index_salon(self, row, offers):
+        salon_id, nome, cidade, regiao, estado, is_bio_diamond, booking_enabled, updated_at = row
+        values = {
+            'cidade': (cidade,) if cidade else (),
+            'regiao': (regiao,) if regiao else (),
+            'is_bio_diamond': (bool(is_bio_diamond),),
+            'booking_enabled': (bool(booking_enabled),),
+            'category': tuple(sorted({category for _, category, _, _ in offers if category})),
+        }
+        position = self.positions.get(salon_id)
+        if position is None:
+            position = self.positions[salon_id] = len(self.ids)
+            self.ids.append(salon_id)
+            self.names.append('')
+            self.labels.append('')
+            self.values.append(None)
+        else:
+            for facet, old_values in self.values[position].items():
+                for value in old_values:
+                    self._clear_bit(facet, value, position)
+            for service_id in self.salon_services.get(salon_id, ()):
+                postings = self.postings.get(service_id)
+                if postings is not None:
+                    postings.pop(position, None)
+
+        self.names[position] = (nome or '').lower()
+        self.labels[position] = nome or ''
+        self.values[position] = values
+        for service_id, category, price, duration in offers:
+            self.postings.setdefault(service_id, {})[position] = (price, duration)
+            self.service_categories[service_id] = category
+        self.salon_services[salon_id] = tuple(service_id for service_id, _, _, _ in offers)
+        self._update_terms(salon_id, self.salon_terms.get(salon_id, ()),
+                           name_terms(nome) if estado == 'Ativo' else ())
+        for facet, new_values in values.items():
+            for value in new_values:
+                self._set_bit(facet, value, position)
+        if estado == 'Ativo':
+            self.active |= 1 << position
+        else:
+            self.active &= ~(1 << position)
+        if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    def _update_terms(self, salon_id, old_terms, new_terms):
+        if self._bulk:
+            # Sorted once at the end of a rebuild
+            self.suggestions.extend((term, salon_id) for term in new_terms)
+        else:
+            for term in old_terms:
+                index = bisect.bisect_left(self.suggestions, (term, salon_id))
+                if index < len(self.suggestions) and self.suggestions[index] == (term, salon_id):
+                    del self.suggestions[index]
+            for term in new_terms:
+                bisect.insort(self.suggestions, (term, salon_id))
+        if new_terms:
+            self.salon_terms[salon_id] = tuple(new_terms)
+        else:
+            self.salon_terms.pop(salon_id, None)
+
+    def _index_rows(self, rows, offers):
+        by_salon = {}
+        for salon_id, service_id, category, price, duration in offers:
+            by_salon.setdefault(salon_id, []).append((service_id, category, price, duration))
+        for row in rows:
+            self._index_salon(row, by_salon.get(row[0], ()))
+
+    def rebuild(self):
+        with self._lock:
+            generation = self.load_state()[2]
+            self._reset()
+            self.generation = generation
+            self._bulk = True
+            try:
+                self._index_rows(self.load_salons(None), self.load_offers(None))
+            finally:
+                self._bulk = False
+            self.suggestions.sort()
+            self._checked = self._rebuilt = time.monotonic()
+
+    def refresh(self):
+        """Re-index salons changed since the last refresh"""
+        with self._lock:
+            newest, count, generation = self.load_state()
+            if (self.watermark is None or count != len(self.ids) or generation != self.generation
+                    or time.monotonic() - self._rebuilt >= self.max_age):
+                self.rebuild()
+                return
+            if newest is not None and newest > self.watermark:
+                # >= so rows sharing the watermark timestamp are not missed
+                rows = self.load_salons(self.watermark)
+                if len(rows) > MAX_INCREMENTAL:
+                    self.rebuild()
+                    return
+                self._index_rows(rows, self.load_offers([row[0] for row in rows]))
+            self._checked = time.monotonic()
+
+    def invalidate(self):
+        """Check for changes on the next access"""
+        self._checked = 0
+
+    def _ensure_fresh(self):
+        if time.monotonic() - self._checked >= self.check_seconds:
+            self.misses += 1
+            self.refresh()
+        else:
+            self.hits += 1
+
+    # Queries
+
+    def _matching(self, facet, needle):
+        """OR of the bitsets of ``facet`` values containing ``needle`` (ilike)"""
+        needle = needle.lower()
+        bits = 0
+        for value, value_bits in self.bitsets[facet].items():
+            if needle in value.lower():
+                bits |= value_bits
+        return bits
+
+    def _offer_positions(self, service_ids, max_price, max_duration):
+        """(service id, salon position) of the offers of ``service_ids`` (any
+        service when None) within the price and duration limits"""
+        for service_id in self.postings if service_ids is None else service_ids:
+            for position, (price, duration) in self.postings.get(service_id, {}).items():
+                if max_price is not None and (price is None or price > max_price):
+                    continue
+                if max_duration is not None and (duration is None or duration > max_duration):
+                    continue
+                yield service_id, position
+
+    def _offer_bits(self, service_ids, max_price, max_duration):
+        """Salons with an offer matching the service filters"""
+        positions = {position for _, position in self._offer_positions(service_ids, max_price, max_duration)}
+        return bits_from_positions(positions, len(self.ids))
+
+    def _category_offer_bits(self, max_price, max_duration):
+        """Per category, salons with an offer of that category within the
+        price and duration limits"""
+        positions = {}
+        for service_id, position in self._offer_positions(None, max_price, max_duration):
+            category = self.service_categories.get(service_id)
+            if category:
+                positions.setdefault(category, set()).add(position)
+        return {category: bits_from_positions(found, len(self.ids)) for category, found in positions.items()}
+
+    def facet_counts(self, cidade=None, regiao=None, search=None, bio_diamond=False,
+                     service_ids=None, max_price=None, max_duration=None,
+                     category=None, uncategorized_service_ids=None):
+        """Facet value counts for the active salons matching the listing filters.
+
+        ``service_ids`` are the requested services plus those of the
+        selected ``category``, ``uncategorized_service_ids`` the requested
+        services alone (None for any), used for the counts of the category
+        facet itself.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            filters = {}
+            if cidade:
+                filters['cidade'] = self._matching('cidade', cidade)
+            if regiao:
+                filters['regiao'] = self._matching('regiao', regiao)
+            if bio_diamond:
+                filters['is_bio_diamond'] = self.bitsets['is_bio_diamond'].get(True, 0)
+            base = self.active
+            if search:
+                needle = search.lower()
+                base &= bits_from_positions(
+                    (position for position, name in enumerate(self.names) if needle in name), len(self.names))
+            values = dict(self.bitsets)
+            if service_ids is not None or max_price is not None or max_duration is not None:
+                # One offer must match every service filter, so the category
+                # filter is the offer filter and each category value counts
+                # the salons with a matching offer of a requested service or
+                # of that category
+                filters['category'] = self._offer_bits(service_ids, max_price, max_duration)
+                if not category:
+                    uncategorized_service_ids = service_ids
+                requested = 0
+                if uncategorized_service_ids is not None:
+                    requested = self._offer_bits(uncategorized_service_ids, max_price, max_duration)
+                by_category = self._category_offer_bits(max_price, max_duration)
+                values['category'] = {
+                    value: by_category.get(value, 0) | requested for value in self.bitsets['category']
+                }
+
+            result = {}
+            for facet in FACETS:
+                scope = base
+                for other, bits in filters.items():
+                    if other != facet:
+                        scope &= bits
+                counts = {}
+                for value, bits in values[facet].items():
+                    count = (scope & bits).bit_count()
+                    if count:
+                        counts[str(value).lower() if isinstance(value, bool) else value] = count
+                result[facet] = dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+            return result
+
+    def suggest(self, query, limit=8):
+        """Active salons with a name word starting with ``query``, plus the
+        matching cities and regions with their active salon counts"""
+        query = normalize(query)
+        with self._lock:
+            self._ensure_fresh()
+            salons = []
+            seen = set()
+            if query:
+                index = bisect.bisect_left(self.suggestions, (query,))
+                while index < len(self.suggestions) and len(salons) < limit:
+                    term, salon_id = self.suggestions[index]
+                    if not term.startswith(query):
+                        break
+                    if salon_id not in seen:
+                        seen.add(salon_id)
+                        salons.append({'id': salon_id, 'label': self.labels[self.positions[salon_id]]})
+                    index += 1
+
+            places = {}
+            for facet in ('cidade', 'regiao'):
+                matches = []
+                for value, bits in self.bitsets[facet].items():
+                    terms = self._place_terms.get(value)
+                    if terms is None:
+                        terms = self._place_terms[value] = name_terms(value)
+                    if any(term.startswith(query) for term in terms):
+                        count = (self.active & bits).bit_count()
+                        if count:
+                            matches.append({'label': value, 'count': count})
+                matches.sort(key=lambda match: (-match['count'], match['label']))
+                places[facet] = matches[:limit]
+            return {'salons': salons, 'cities': places['cidade'], 'regions': places['regiao']}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.ids),
+                'salons': len(self.ids),
+                'suggestion_terms': len(self.suggestions),
+                'values': {facet: len(bitsets) for facet, bitsets in self.bitsets.items()},
+                'watermark': self.watermark.isoformat() if self.watermark else None,
+            }
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Bitmap arithmetic for salon availability.
+
+A salon day is represented as Python ints with one bit per minute of the
+day: the minutes at which a booking slot may start and the minutes at
+which a booking row exists. Booking slots are SLOT_MINUTES long and start
+every SLOT_MINUTES from the opening time of each opening-hours window,
+and a service of ``duration`` minutes occupies consecutive slots, stored
+as one booking row per slot.
+
+A start ``s`` is free when no booking row exists at ``s``, ``s + 30``, ...
+before ``s + duration``. Shifting the bookings bitmap right by each of
+those offsets and OR-ing the results blocks every affected start at
+once, so the free starts of a whole day are a handful of integer
+operations per salon instead of a loop over slots and bookings.
+
+``WeeklySchedule`` is a salon's opening hours in that form: the windows
+of each weekday (several per day for split shifts) with the start
+bitmaps computed once per duration. ``ScheduleCache`` keeps them per
+salon, versioned by ``Salon.updated_at`` which every opening-hours write
+bumps. Callers that already hold the salon's version pass it and get an
+exact answer; otherwise the version is re-checked at most every
+SCHEDULE_CHECK_SECONDS.
+
+Dated exceptions (closed days, reduced hours) and the holidays of the
+salon's holiday calendar replace the weekly hours of their dates; they
+are turned into per-date windows by ``date_overrides`` and applied with
+``WeeklySchedule.starts_on``.
+"""
+
+import os
+import threading
+import time as clock
+from collections import OrderedDict
+from datetime import time
+
+SLOT_MINUTES = 30
+MINUTES_PER_DAY = 24 * 60
+
+
+def minute_of_day(value):
+    return value.hour * 60 + value.minute
+
+
+def format_minute(minute):
+    return f'{minute // 60:02d}:{minute % 60:02d}'
+
+
+def parse_minute(text):
+    """'HH:MM' -> minute of the day, ValueError on bad input"""
+    hours, _, minutes = text.partition(':')
+    value = time(int(hours), int(minutes))
+    return minute_of_day(value)
+
+
+def slot_starts(start, end, duration):
+    """Bitmap of the slot starts of the opening window [start, end) (in
+    minutes) whose service of ``duration`` minutes ends by closing time"""
+    bits = 0
+    for minute in range(start, end - max(duration, SLOT_MINUTES) + 1, SLOT_MINUTES):
+        bits |= 1 << minute
+    return bits
+
+
+def booked_bits(booking_times):
+    """Bitmap of the minutes holding a booking row"""
+    bits = 0
+    for value in booking_times:
+        bits |= 1 << minute_of_day(value)
+    return bits
+
+
+def range_bits(earliest=0, latest=MINUTES_PER_DAY):
+    """Bitmap of the minutes in [earliest, latest)"""
+    if latest <= earliest:
+        return 0
+    return ((1 << (latest - earliest)) - 1) << earliest
+
+
+def free_starts(starts, booked, duration):
+    """Starts of ``starts`` whose occupied slots hold no booking"""
+    blocked = 0
+    for offset in range(0, duration, SLOT_MINUTES):
+        blocked |= booked >> offset
+    return starts & ~blocked
+
+
+def window_starts(windows, duration):
+    """Slot starts bitmap of several opening windows"""
+    bits = 0
+    for start, end in windows:
+        bits |= slot_starts(start, end, duration)
+    return bits
+
+
+def window_at(windows, minute):
+    """The window of ``windows`` containing ``minute``, or None"""
+    for start, end in windows:
+        if start <= minute < end:
+            return start, end
+    return None
+
+
+def date_overrides(exceptions, holidays=()):
+    """date -> windows replacing the weekly hours of that date, an empty
+    tuple closing it.
+
+    ``exceptions`` are (date, start time, end time) rows, a row without
+    times closes the date and rows with times are its reduced hours.
+    ``holidays`` are dates closed unless an exception reopens them.
+    """
+    overrides = {day: () for day in holidays}
+    explicit = {}
+    for day, start, end in exceptions:
+        windows = explicit.setdefault(day, set())
+        windows.add(None if start is None or end is None else (minute_of_day(start), minute_of_day(end)))
+    for day, windows in explicit.items():
+        overrides[day] = () if None in windows else tuple(sorted(windows))
+    return overrides
+
+
+def minutes(bits):
+    """Set minutes of a bitmap in ascending order"""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+class WeeklySchedule:
+    """Opening hours of one salon as minute windows per weekday"""
+
+    __slots__ = ('version', 'windows', 'holiday_calendar', '_starts')
+
+    def __init__(self, version, rows, holiday_calendar=None):
+        """``rows`` are (day_of_week, start time, end time) tuples"""
+        by_day = [set() for _ in range(7)]
+        for day, start, end in rows:
+            if start is not None and end is not None and 0 <= day <= 6:
+                by_day[day].add((minute_of_day(start), minute_of_day(end)))
+        self.version = version
+        self.windows = tuple(tuple(sorted(windows)) for windows in by_day)
+        self.holiday_calendar = holiday_calendar
+        self._starts = {}
+
+    def starts(self, day, duration):
+        """Bitmap of the slot starts of ``day`` for a service of ``duration``"""
+        key = (day, duration)
+        bits = self._starts.get(key)
+        if bits is None:
+            bits = self._starts[key] = window_starts(self.windows[day], duration)
+        return bits
+
+    def windows_on(self, date, overrides=None):
+        """Opening windows of a date, after its exceptions"""
+        if overrides and date in overrides:
+            return overrides[date]
+        return self.windows[date.weekday()]
+
+    def starts_on(self, date, duration, overrides=None):
+        """Slot starts bitmap of a date, after its exceptions"""
+        if overrides and date in overrides:
+            return window_starts(overrides[date], duration)
+        return self.starts(date.weekday(), duration)
+
+
+class ScheduleCache:
+    def __init__(self, load, load_version, check_seconds=None, max_entries=None):
+        """``load(salon_id)`` returns (version, rows) for ``WeeklySchedule``
+        or None for an unknown salon, ``load_version(salon_id)`` just the
+        version"""
+        self.load = load
+        self.load_version = load_version
+        self.check_seconds = check_seconds if check_seconds is not None else float(
+            os.getenv('SCHEDULE_CHECK_SECONDS', '5'))
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.getenv('SCHEDULE_CACHE_SIZE', '50000'))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, salon_id, version=None):
+        """Schedule of ``salon_id``; ``version`` is the salon's current
+        ``updated_at`` when the caller knows it"""
+        now = clock.monotonic()
+        with self._lock:
+            entry = self._entries.get(salon_id)
+            if entry is not None:
+                self._entries.move_to_end(salon_id)
+        if entry is not None:
+            schedule, checked = entry
+            if version is None and now - checked < self.check_seconds:
+                self.hits += 1
+                return schedule
+            if version is None:
+                version = self.load_version(salon_id)
+            if version == schedule.version:
+                self.hits += 1
+                with self._lock:
+                    self._entries[salon_id] = (schedule, now)
+                return schedule
+
+        loaded = self.load(salon_id)
+        self.misses += 1
+        if loaded is None:
+            self.invalidate([salon_id])
+            return None
+        schedule = WeeklySchedule(*loaded)
+        with self._lock:
+            self._entries[salon_id] = (schedule, now)
+            self._entries.move_to_end(salon_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return schedule
+
+    def invalidate(self, salon_ids=None):
+        """Drop the given salons, or every salon"""
+        with self._lock:
+            if salon_ids is None:
+                self._entries.clear()
+            else:
+                for salon_id in salon_ids:
+                    self._entries.pop(salon_id, None)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
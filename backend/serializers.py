@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Shared response serializers for the BioSearch API.
+
+Each resource declares its output fields once. A RowSerializer turns a
+SQLAlchemy ``Row`` (selected in the same column order) or an ORM instance
+into a response dict without per-field formatting code. Dates and
+datetimes are left as-is and rendered by the JSON provider below.
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+from operator import attrgetter
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+
+def format_time(value):
+    """Format a time of day as HH:MM"""
+    return value.strftime('%H:%M') if value is not None else None
+
+
+class RowSerializer:
+    """Convert rows into response dicts using a precompiled field list"""
+
+    __slots__ = ('fields', '_converters', '_getter')
+
+    def __init__(self, fields, converters=None):
+        self.fields = tuple(fields)
+        self._converters = tuple(
+            (self.fields.index(name), func) for name, func in (converters or {}).items()
+        )
+        getter = attrgetter(*self.fields)
+        # attrgetter returns a bare value for a single field, keep rows uniform
+        self._getter = getter if len(self.fields) > 1 else (lambda obj: (getter(obj),))
+
+    def columns(self, model):
+        """Return the model columns matching this serializer's field order"""
+        return [getattr(model, name) for name in self.fields]
+
+    def row(self, row):
+        """Serialize a Row/tuple whose values follow ``fields`` order"""
+        if self._converters:
+            row = list(row)
+            for index, func in self._converters:
+                row[index] = func(row[index])
+        return dict(zip(self.fields, row))
+
+    def rows(self, rows):
+        return [self.row(row) for row in rows]
+
+    def obj(self, obj):
+        """Serialize an ORM instance"""
+        return self.row(self._getter(obj))
+
+    def objs(self, objs):
+        return [self.obj(obj) for obj in objs]
+
+    def group_rows(self, rows, key_index=0, offset=0):
+        """Group rows by the value at ``key_index`` and serialize
+        ``row[offset:]`` for each of them"""
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row[key_index], []).append(self.row(row[offset:] if offset else row))
+        return grouped
+
+
+# Salon shapes
+salon_public = RowSerializer((
+    'id', 'nome', 'cidade', 'regiao', 'telefone', 'email', 'website', 'rua',
+    'porta', 'cod_postal', 'latitude', 'longitude', 'booking_enabled',
+    'is_bio_diamond', 'about'
+))
+
+salon_manager = RowSerializer((
+    'id', 'nome', 'cidade', 'regiao', 'telefone', 'email', 'website', 'rua',
+    'porta', 'cod_postal', 'about', 'estado', 'booking_enabled',
+    'is_bio_diamond', 'created_at'
+))
+
+salon_admin = RowSerializer((
+    'id', 'nome', 'cidade', 'regiao', 'telefone', 'email', 'estado',
+    'booking_enabled', 'is_active', 'is_bio_diamond', 'created_at'
+))
+
+salon_summary = RowSerializer((
+    'id', 'nome', 'cidade', 'regiao', 'telefone', 'email', 'estado',
+    'booking_enabled', 'is_active', 'created_at'
+))
+
+# Images, always ordered primary first then by display_order
+image = RowSerializer((
+    'id', 'salon_id', 'image_url', 'image_alt', 'is_primary', 'display_order',
+    'created_at'
+))
+
+# Service catalog entries
+service = RowSerializer(('id', 'name', 'category', 'description', 'is_bio_diamond'))
+
+# A service as offered by a salon: catalog fields plus price/duration
+salon_service = RowSerializer((
+    'id', 'name', 'category', 'description', 'is_bio_diamond', 'price', 'duration'
+))
+
+# Same as salon_service, keyed by the salon_services row for management
+managed_salon_service = RowSerializer((
+    'id', 'service_id', 'name', 'category', 'description', 'is_bio_diamond',
+    'price', 'duration'
+))
+
+booking = RowSerializer((
+    'id', 'salon_id', 'service_id', 'customer_name', 'customer_email',
+    'customer_phone', 'booking_date', 'booking_time', 'duration', 'status',
+    'created_at'
+), converters={'booking_time': format_time})
+
+salon_booking = RowSerializer((
+    'id', 'customer_name', 'customer_email', 'customer_phone', 'service_id',
+    'booking_date', 'booking_time', 'duration', 'status', 'created_at'
+), converters={'booking_time': format_time})
+
+# Admin export of reviews, with the reviewer's email
+review_export = RowSerializer((
+    'id', 'salon_id', 'customer_name', 'customer_email', 'rating', 'title',
+    'comment', 'created_at', 'is_verified'
+))
+
+# Dated changes to a salon's weekly hours
+schedule_exception = RowSerializer((
+    'id', 'date', 'start_time', 'end_time', 'note'
+), converters={'start_time': format_time, 'end_time': format_time})
+
+holiday = RowSerializer(('date', 'name'))
+
+# Background jobs for the admin job list
+job = RowSerializer((
+    'id', 'name', 'payload', 'status', 'attempts', 'max_attempts', 'run_at',
+    'idempotency_key', 'locked_by', 'last_error', 'created_at', 'finished_at'
+))
+
+review = RowSerializer((
+    'id', 'customer_name', 'rating', 'title', 'comment', 'created_at',
+    'is_verified'
+))
+
+
+def _default(value):
+    """Encode the types our rows contain that JSON has no native form for"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson when it is installed.
+
+    Dates and datetimes are emitted in ISO 8601 (matching ``isoformat()``)
+    in both the orjson and the stdlib code paths.
+    """
+
+    default = staticmethod(_default)
+    sort_keys = False
+    ensure_ascii = False
+
+    _options = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def dumpb(self, obj):
+        """Serialize straight to UTF-8 bytes"""
+        if orjson is None:
+            return self.dumps(obj, separators=(',', ':')).encode()
+        return orjson.dumps(obj, default=_default, option=self._options)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(obj)
+        return self._app.response_class(self.dumpb(obj), mimetype=self.mimetype)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Signed, expiring access tokens.
+
+A token carries the user id, the admin flag and the user's token version,
+signed with SECRET_KEY (HMAC-SHA256 via itsdangerous) and timestamped, so
+verifying it needs no database lookup. Tokens expire after
+ACCESS_TOKEN_TTL seconds.
+
+Revocation works through ``users.token_version``: bumping it (logout,
+rotation, deactivation) invalidates every token issued before. Versions
+are read through a small in-process cache (TOKEN_VERSION_TTL seconds), so
+the common case is still free of queries; a bump made by another worker
+is picked up once its cache entry expires.
+"""
+
+import os
+import threading
+import time
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+TOKEN_PREFIX = 'v1.'
+
+
+class TokenSigner:
+    def __init__(self, secret_key, ttl=None):
+        self.serializer = URLSafeTimedSerializer(secret_key, salt='biosearch-access-token')
+        self.ttl = ttl if ttl is not None else int(os.getenv('ACCESS_TOKEN_TTL', str(7 * 24 * 3600)))
+
+    def issue(self, user_id, is_admin, version):
+        return TOKEN_PREFIX + self.serializer.dumps([user_id, bool(is_admin), version or 0])
+
+    def verify(self, token):
+        """Return (user_id, is_admin, version), or None if the token is
+        malformed, tampered with or expired"""
+        if not token.startswith(TOKEN_PREFIX):
+            return None
+        try:
+            user_id, is_admin, version = self.serializer.loads(token[len(TOKEN_PREFIX):], max_age=self.ttl)
+        except (BadSignature, SignatureExpired, ValueError, TypeError):
+            return None
+        return user_id, is_admin, version
+
+
+class TokenVersionCache:
+    """user id -> current token version (None for inactive users), read
+    through ``loader`` and kept for ``ttl`` seconds"""
+
+    def __init__(self, loader, ttl=None, max_entries=10000):
+        self.loader = loader
+        self.ttl = ttl if ttl is not None else float(os.getenv('TOKEN_VERSION_TTL', '30'))
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        entry = self.entries.get(user_id)
+        if entry is not None and entry[1] > now:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        version = self.loader(user_id)
+        self.set(user_id, version)
+        return version
+
+    def check(self, user_id, version):
+        """Whether ``version`` is the current one for ``user_id``.
+
+        A token newer than the cached version (rotated or reactivated on
+        another worker) triggers a reload instead of being rejected.
+        """
+        current = self.get(user_id)
+        if current is None or version > current:
+            self.forget(user_id)
+            current = self.get(user_id)
+        return current == version
+
+    def set(self, user_id, version):
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            self.entries[user_id] = (version, time.monotonic() + self.ttl)
+
+    def forget(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
+
+
+class CurrentUser:
+    """Authenticated user known from the token alone.
+
+    ``id`` and ``is_admin`` come from the token; any other attribute loads
+    the user row on first access through ``loader``.
+    """
+
+    def __init__(self, id, is_admin, loader):
+        self.id = id
+        self.is_admin = is_admin
+        self._loader = loader
+        self._user = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._user is None:
+            self._user = self._loader(self.id)
+        return getattr(self._user, name)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Background job worker, the ``worker`` process of the Procfile.
+
+Runs the jobs enqueued with ``app.jobs`` (see jobs.py) until SIGTERM or
+SIGINT, finishing the current job before exiting. Start several workers
+to run jobs in parallel.
+
+Usage:
+  python backend/worker.py           # run until stopped
+  python backend/worker.py --burst   # run the due jobs, then exit
+"""
+
+import argparse
+import logging
+import signal
+
+from app import app, jobs
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background jobs')
+    parser.add_argument('--burst', action='store_true', help='exit once no job is due')
+    parser.add_argument('--worker-id', help='name recorded on claimed jobs (default: host:pid)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: jobs.stop())
+
+    with app.app_context():
+        processed = jobs.work(worker_id=args.worker_id, burst=args.burst)
+    logging.getLogger('biosearch.jobs').info('Worker stopped after %s jobs', processed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the time_slots and bookings indexes used by the
+availability endpoints, including the cross-salon availability search.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import app, db
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_time_slots_salon_day ON time_slots (salon_id, day_of_week)',
+    'CREATE INDEX IF NOT EXISTS ix_bookings_salon_date ON bookings (salon_id, booking_date, booking_time)',
+]
+
+def add_availability_indexes():
+    """Create the availability indexes"""
+    with app.app_context():
+        with db.engine.connect() as connection:
+            for statement in INDEXES:
+                connection.execute(db.text(statement))
+            connection.commit()
+        print(f"Created {len(INDEXES)} availability indexes")
+
+if __name__ == '__main__':
+    add_availability_indexes()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Migration script to create the jobs table used by the background job
+queue (backend/jobs.py), with its claim index.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import app, db, Job
+
+def add_jobs_table():
+    """Create the jobs table"""
+    with app.app_context():
+        Job.__table__.create(db.engine, checkfirst=True)
+        print("Created jobs table")
+
+if __name__ == '__main__':
+    add_jobs_table()
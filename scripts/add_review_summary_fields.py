@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the review summary fields (rating_avg,
+review_count) to the salons table, backfill them from the reviews and
+create the indexes behind the sort options of the salon listing.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import app, db, refresh_review_summaries
+
+COLUMNS = [
+    ('rating_avg', 'FLOAT DEFAULT 0'),
+    ('review_count', 'INTEGER DEFAULT 0'),
+]
+
+INDEXES = [
+    # Review summaries are recomputed per salon
+    'CREATE INDEX IF NOT EXISTS ix_reviews_salon_id ON reviews (salon_id)',
+    'CREATE INDEX IF NOT EXISTS ix_salons_rating ON salons (rating_avg, review_count, id)',
+    'CREATE INDEX IF NOT EXISTS ix_salons_review_count ON salons (review_count, rating_avg, id)',
+    'CREATE INDEX IF NOT EXISTS ix_salons_nome ON salons (nome, id)',
+    'CREATE INDEX IF NOT EXISTS ix_salons_location ON salons (latitude, longitude)',
+]
+
+def add_review_summary_fields():
+    """Add and backfill the review summary fields of the salons table"""
+    with app.app_context():
+        for name, definition in COLUMNS:
+            try:
+                with db.engine.connect() as connection:
+                    connection.execute(db.text(f'ALTER TABLE salons ADD COLUMN {name} {definition}'))
+                    connection.commit()
+                print(f"Successfully added '{name}' column to salons table")
+            except Exception as e:
+                if "already exists" in str(e) or "duplicate column" in str(e).lower():
+                    print(f"Column '{name}' already exists in salons table")
+                else:
+                    print(f"Error adding {name} column: {e}")
+                    return
+        
+        with db.engine.connect() as connection:
+            for statement in INDEXES:
+                connection.execute(db.text(statement))
+            connection.commit()
+        print(f"Created {len(INDEXES)} indexes")
+        
+        refresh_review_summaries()
+        db.session.commit()
+        print("Backfilled rating_avg and review_count from the reviews table")
+
+if __name__ == '__main__':
+    add_review_summary_fields()
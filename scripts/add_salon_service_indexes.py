@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the salon_services indexes used by the service,
+category, price and duration filters of the salon listing.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import app, db
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_salon_services_salon_service ON salon_services '
+    '(salon_id, service_id, price, duration)',
+    'CREATE INDEX IF NOT EXISTS ix_salon_services_service_price ON salon_services (service_id, price)',
+]
+
+def add_salon_service_indexes():
+    """Create the salon_services search indexes"""
+    with app.app_context():
+        with db.engine.connect() as connection:
+            for statement in INDEXES:
+                connection.execute(db.text(statement))
+            connection.commit()
+        print(f"Created {len(INDEXES)} salon_services indexes")
+
+if __name__ == '__main__':
+    add_salon_service_indexes()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Migration script for the holiday and exception calendar.
+
+Creates the schedule_exceptions and holidays tables, adds the
+holiday_calendar column to salons and, with --holidays-year, loads the
+Portuguese national holidays of those years into the 'PT' calendar.
+
+Usage:
+  python scripts/add_schedule_exceptions.py --holidays-year 2026 2027
+"""
+
+import argparse
+import sys
+import os
+from datetime import date, timedelta
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import app, db, Holiday, ScheduleException
+
+FIXED_HOLIDAYS = [
+    (1, 1, 'Ano Novo'),
+    (4, 25, 'Dia da Liberdade'),
+    (5, 1, 'Dia do Trabalhador'),
+    (6, 10, 'Dia de Portugal'),
+    (8, 15, 'Assunção de Nossa Senhora'),
+    (10, 5, 'Implantação da República'),
+    (11, 1, 'Dia de Todos os Santos'),
+    (12, 1, 'Restauração da Independência'),
+    (12, 8, 'Imaculada Conceição'),
+    (12, 25, 'Natal'),
+]
+
+def easter(year):
+    """Easter Sunday of the Gregorian calendar"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (b - (b + 8) // 25 + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def portuguese_holidays(year):
+    """National holidays of Portugal as (date, name) pairs"""
+    sunday = easter(year)
+    holidays = [(date(year, month, day), name) for month, day, name in FIXED_HOLIDAYS]
+    holidays += [
+        (sunday - timedelta(days=2), 'Sexta-feira Santa'),
+        (sunday, 'Páscoa'),
+        (sunday + timedelta(days=60), 'Corpo de Deus'),
+    ]
+    return sorted(holidays)
+
+def add_schedule_exceptions(holiday_years=()):
+    """Create the exception tables and optionally load holidays"""
+    with app.app_context():
+        for model in (ScheduleException, Holiday):
+            model.__table__.create(db.engine, checkfirst=True)
+        print("Created schedule_exceptions and holidays tables")
+
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(db.text('ALTER TABLE salons ADD COLUMN holiday_calendar VARCHAR(20)'))
+                connection.commit()
+            print("Successfully added 'holiday_calendar' column to salons table")
+        except Exception as e:
+            if "already exists" in str(e) or "duplicate column" in str(e).lower():
+                print("Column 'holiday_calendar' already exists in salons table")
+            else:
+                print(f"Error adding holiday_calendar column: {e}")
+                return
+
+        for year in holiday_years:
+            holidays = portuguese_holidays(year)
+            Holiday.query.filter(
+                Holiday.calendar == 'PT',
+                Holiday.date.between(date(year, 1, 1), date(year, 12, 31))
+            ).delete(synchronize_session=False)
+            db.session.execute(Holiday.__table__.insert(), [
+                {'calendar': 'PT', 'date': day, 'name': name} for day, name in holidays
+            ])
+            db.session.commit()
+            print(f"Loaded {len(holidays)} PT holidays for {year}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add the holiday and exception calendar tables')
+    parser.add_argument('--holidays-year', type=int, nargs='*', default=[],
+                        help='load the Portuguese national holidays of these years')
+    args = parser.parse_args()
+    add_schedule_exceptions(args.holidays_year)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Migration script to add updated_at field to services table.
+The newest updated_at (with the row count) versions the in-memory services
+catalog, so workers notice catalog edits.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import app, db, Service
+
+def add_service_updated_at_field():
+    """Add updated_at field to services table"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(db.text('ALTER TABLE services ADD COLUMN updated_at TIMESTAMP'))
+                connection.commit()
+            print("Successfully added 'updated_at' column to services table")
+        except Exception as e:
+            if "already exists" in str(e) or "duplicate column" in str(e).lower():
+                print("Column 'updated_at' already exists in services table")
+            else:
+                print(f"Error adding updated_at column: {e}")
+                return
+        
+        with db.engine.connect() as connection:
+            result = connection.execute(db.text(
+                'UPDATE services SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL'
+            ))
+            connection.commit()
+        print(f"Backfilled updated_at for {result.rowcount} services")
+
+if __name__ == '__main__':
+    add_service_updated_at_field()
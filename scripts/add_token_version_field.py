@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Migration script to add token_version field to users table.
+Access tokens carry the version they were issued with; bumping it on
+logout, rotation or deactivation revokes every older token.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import app, db, User
+
+def add_token_version_field():
+    """Add token_version field to users table"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(db.text(
+                    'ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0'
+                ))
+                connection.commit()
+            print("Successfully added 'token_version' column to users table")
+        except Exception as e:
+            if "already exists" in str(e) or "duplicate column" in str(e).lower():
+                print("Column 'token_version' already exists in users table")
+            else:
+                print(f"Error adding token_version column: {e}")
+
+if __name__ == '__main__':
+    add_token_version_field()
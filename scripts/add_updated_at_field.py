@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Migration script to add updated_at field to salons table.
+The column versions salon responses for ETag/Last-Modified caching and is
+backfilled from created_at for existing rows.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import app, db, Salon
+
+def add_updated_at_field():
+    """Add updated_at field to salons table"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(db.text('ALTER TABLE salons ADD COLUMN updated_at TIMESTAMP'))
+                connection.commit()
+            print("Successfully added 'updated_at' column to salons table")
+        except Exception as e:
+            if "already exists" in str(e) or "duplicate column" in str(e).lower():
+                print("Column 'updated_at' already exists in salons table")
+            else:
+                print(f"Error adding updated_at column: {e}")
+                return
+        
+        with db.engine.connect() as connection:
+            connection.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_salons_updated_at ON salons (updated_at)'
+            ))
+            result = connection.execute(db.text(
+                'UPDATE salons SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) '
+                'WHERE updated_at IS NULL'
+            ))
+            connection.commit()
+        print(f"Backfilled updated_at for {result.rowcount} salons")
+
+if __name__ == '__main__':
+    add_updated_at_field()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark bytes-on-the-wire and CPU cost of response compression.
+
+Builds /api/salons style payloads of increasing size and reports, for
+each gzip level and brotli quality, the compressed size, ratio and the
+median time spent compressing one response.
+
+Usage: python scripts/benchmark_compression.py [--repeat 20] [--json out.json]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from compression import brotli, compress
+
+CITIES = ['Lisboa', 'Porto', 'Braga', 'Coimbra', 'Faro', 'Aveiro', 'Setúbal', 'Viseu']
+SALON_COUNTS = [1, 10, 20, 100, 500]
+
+
+def synthetic_salon(salon_id, rng):
+    """A salon shaped like a get_salons list item"""
+    cidade = rng.choice(CITIES)
+    return {
+        'id': salon_id,
+        'nome': f'Salão Beleza {salon_id}',
+        'cidade': cidade,
+        'regiao': cidade,
+        'telefone': f'+351 2{rng.randint(10000000, 99999999)}',
+        'email': f'salao{salon_id}@example.pt',
+        'website': f'www.salao{salon_id}.pt',
+        'rua': f'Rua {rng.choice(["das Flores", "Augusta", "do Carmo", "Direita"])}',
+        'porta': str(rng.randint(1, 300)),
+        'cod_postal': f'{rng.randint(1000, 9999)}-{rng.randint(100, 999)}',
+        'latitude': round(rng.uniform(37.0, 42.0), 6),
+        'longitude': round(rng.uniform(-9.5, -6.5), 6),
+        'booking_enabled': rng.random() < 0.5,
+        'is_bio_diamond': rng.random() < 0.3,
+        'about': ' '.join(rng.choice(['Manicure', 'pedicure', 'unhas', 'gel', 'BIO', 'tratamento', 'cuidado'])
+                          for _ in range(rng.randint(20, 120))),
+        'images': [{
+            'id': salon_id * 10 + index,
+            'salon_id': salon_id,
+            'image_url': f'https://images.example.com/salons/{salon_id}/{index}.jpg',
+            'image_alt': f'Salão Beleza {salon_id}',
+            'is_primary': index == 0,
+            'display_order': index,
+            'created_at': '2024-05-01T10:00:00'
+        } for index in range(rng.randint(0, 4))],
+        'reviews': {'average_rating': round(rng.uniform(1, 5), 1), 'total_reviews': rng.randint(0, 200)}
+    }
+
+
+def build_payload(count, rng):
+    return {
+        'salons': [synthetic_salon(salon_id, rng) for salon_id in range(1, count + 1)],
+        'total': count,
+        'pages': 1,
+        'current_page': 1
+    }
+
+
+def time_compression(data, encoding, level, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compressed = compress(data, encoding, level)
+        timings.append(time.perf_counter() - start)
+    return compressed, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=20, help='compressions per measurement')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    codecs = [('gzip', level) for level in (1, 6, 9)]
+    if brotli is not None:
+        codecs += [('br', quality) for quality in (1, 4, 9, 11)]
+    else:
+        print("brotli is not installed, only gzip is measured")
+
+    results = []
+    print(f"{'salons':>6} {'raw bytes':>10} {'codec':>8} {'bytes':>9} {'ratio':>6} {'ms/resp':>8} {'MB/s':>7}")
+    for count in SALON_COUNTS:
+        data = json.dumps(build_payload(count, rng), separators=(',', ':'), ensure_ascii=False).encode()
+        for encoding, level in codecs:
+            compressed, seconds = time_compression(data, encoding, level, args.repeat)
+            if encoding == 'gzip':
+                assert gzip.decompress(compressed) == data
+            result = {
+                'salons': count,
+                'raw_bytes': len(data),
+                'encoding': encoding,
+                'level': level,
+                'compressed_bytes': len(compressed),
+                'ratio': round(len(compressed) / len(data), 4),
+                'ms_per_response': round(seconds * 1000, 4),
+                'mb_per_second': round(len(data) / seconds / 1e6, 1) if seconds else None
+            }
+            results.append(result)
+            print(f"{count:>6} {len(data):>10} {encoding + '-' + str(level):>8} {len(compressed):>9} "
+                  f"{result['ratio']:>6.3f} {result['ms_per_response']:>8.3f} {result['mb_per_second']:>7}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'repeat': args.repeat, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
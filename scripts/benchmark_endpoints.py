@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Benchmark every public, manager and admin endpoint through Flask's test client.
+
+Runs against a database produced by generate_synthetic_data.py and, for each
+endpoint, records the latency distribution, SQL statements per request and
+response size. Results are written as JSON (tagged with the git commit) so
+runs on different commits can be compared with --compare.
+
+Usage:
+  python scripts/generate_synthetic_data.py --database-url sqlite:////tmp/biosearch_bench.db
+  python scripts/benchmark_endpoints.py --database-url sqlite:////tmp/biosearch_bench.db
+  python scripts/benchmark_endpoints.py --compare benchmark_results/old.json benchmark_results/new.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generate_synthetic_data import ADMIN_EMAIL, BENCH_PASSWORD, MANAGER_EMAIL
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def login(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise SystemExit(f"Login failed for {email}: {response.status_code} {response.get_data(as_text=True)}")
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def build_cases(backend, client):
+    """Return (group, name, method, url, headers, body factory) tuples"""
+    db = backend.db
+    Salon, Booking, User = backend.Salon, backend.Booking, backend.User
+    admin = login(client, ADMIN_EMAIL)
+    manager = login(client, MANAGER_EMAIL)
+
+    manager_id = db.session.query(User.id).filter_by(email=MANAGER_EMAIL).scalar()
+    own_salon = db.session.query(Salon.id).filter_by(owner_id=manager_id).order_by(Salon.id).first()[0]
+    bookable = db.session.query(Salon.id).filter(Salon.booking_enabled == True, Salon.estado == 'Ativo') \
+        .order_by(Salon.id.desc()).first()[0]
+    busy_salon = db.session.query(Booking.salon_id).order_by(Booking.id).first()[0]
+    booking_id = db.session.query(Booking.id).filter_by(salon_id=own_salon).order_by(Booking.id).first()
+    booking_id = booking_id[0] if booking_id else 1
+    salon_service = db.session.query(backend.SalonService.id, backend.SalonService.service_id) \
+        .filter_by(salon_id=own_salon).first()
+    service_id = db.session.query(backend.SalonService.service_id).filter_by(salon_id=bookable).first()[0]
+    next_monday = date.today() + timedelta(days=7 - date.today().weekday())
+    future = {'day': next_monday + timedelta(days=7000)}
+
+    def next_booking():
+        # A fresh weekday far in the future for every booking request
+        future['day'] += timedelta(days=1)
+        if future['day'].weekday() >= 5:
+            future['day'] += timedelta(days=7 - future['day'].weekday())
+        return {'salon_id': bookable, 'service_id': service_id, 'customer_name': 'Bench',
+                'customer_email': 'bench@example.com', 'booking_date': future['day'].isoformat(),
+                'booking_time': '10:00'}
+
+    availability_day = next_monday.isoformat()
+    return [
+        ('public', 'health', 'GET', '/api/health', None, None),
+        ('public', 'salons', 'GET', '/api/salons', None, None),
+        ('public', 'salons_page_100', 'GET', '/api/salons?per_page=100&page=3', None, None),
+        ('public', 'salons_city', 'GET', '/api/salons?cidade=Porto', None, None),
+        ('public', 'salons_search', 'GET', '/api/salons?search=Beleza&bio_diamond=true', None, None),
+        ('public', 'salon_detail', 'GET', f'/api/salons/{busy_salon}', None, None),
+        ('public', 'services', 'GET', '/api/services', None, None),
+        ('public', 'availability', 'GET',
+         f'/api/salons/{busy_salon}/availability?date={availability_day}&service_id={service_id}', None, None),
+        ('public', 'salon_reviews', 'GET', f'/api/salons/{busy_salon}/reviews', None, None),
+        ('public', 'salon_images', 'GET', f'/api/salons/{busy_salon}/images', None, None),
+        ('public', 'booking', 'GET', f'/api/bookings/{booking_id}', None, None),
+        ('public', 'create_review', 'POST', f'/api/salons/{bookable}/reviews', None,
+         lambda: {'customer_name': 'Bench', 'customer_email': 'bench@example.com', 'rating': 5}),
+        ('public', 'create_booking', 'POST', '/api/bookings', None, next_booking),
+        ('manager', 'me', 'GET', '/api/auth/me', manager, None),
+        ('manager', 'manager_salons', 'GET', '/api/manager/salons', manager, None),
+        ('manager', 'salon_bookings', 'GET', f'/api/manager/salons/{own_salon}/bookings', manager, None),
+        ('manager', 'salon_services', 'GET', f'/api/manager/salons/{own_salon}/services', manager, None),
+        ('manager', 'opening_hours', 'GET', f'/api/manager/salons/{own_salon}/opening-hours', manager, None),
+        ('manager', 'update_salon', 'PUT', f'/api/manager/salons/{own_salon}', manager,
+         lambda: {'about': f'Updated at {datetime.utcnow().isoformat()}'}),
+        ('manager', 'update_service', 'PUT', f'/api/manager/salons/{own_salon}/services/{salon_service[0]}',
+         manager, lambda: {'price': 42.0}),
+        ('admin', 'users', 'GET', '/api/admin/users', admin, None),
+        ('admin', 'user_detail', 'GET', f'/api/admin/users/{manager_id}', admin, None),
+        ('admin', 'salons', 'GET', '/api/admin/salons', admin, None),
+        ('admin', 'salons_page_100', 'GET', '/api/admin/salons?per_page=100', admin, None),
+        ('admin', 'stats', 'GET', '/api/admin/stats', admin, None),
+    ]
+
+
+def run_case(client, capture_queries, case, iterations, warmup):
+    group, name, method, url, headers, body = case
+    timings, query_counts, sizes, statuses = [], [], [], set()
+    for iteration in range(warmup + iterations):
+        kwargs = {'headers': headers or {}}
+        if body is not None:
+            kwargs['json'] = body()
+        with capture_queries() as stats:
+            started = time.perf_counter()
+            response = client.open(url, method=method, **kwargs)
+            elapsed = time.perf_counter() - started
+        if iteration < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        query_counts.append(stats.count)
+        sizes.append(len(response.data))
+        statuses.add(response.status_code)
+    timings.sort()
+    return {
+        'group': group, 'name': name, 'method': method, 'url': url,
+        'statuses': sorted(statuses),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': max(query_counts),
+        'response_bytes': int(statistics.median(sizes)),
+    }
+
+
+def run(args):
+    os.environ['DATABASE_URL'] = args.database_url
+    # Measure the work behind each endpoint, not cache hits
+    os.environ['RESPONSE_CACHE_ENABLED'] = 'true' if args.cache else 'false'
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+    import app as backend
+    from query_stats import capture_queries
+
+    client = backend.app.test_client()
+    with backend.app.app_context():
+        counts = {name: backend.db.session.query(model).count() for name, model in (
+            ('salons', backend.Salon), ('bookings', backend.Booking),
+            ('reviews', backend.Review), ('images', backend.SalonImage))}
+        cases = build_cases(backend, client)
+        backend.db.session.remove()
+
+    print(f"Dataset: {counts}")
+    print(f"{'endpoint':<32} {'status':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'bytes':>9}")
+    results = []
+    for case in cases:
+        if args.only and case[1] not in args.only:
+            continue
+        result = run_case(client, capture_queries, case, args.iterations, args.warmup)
+        results.append(result)
+        print(f"{result['group'] + '.' + result['name']:<32} {','.join(map(str, result['statuses'])):>8} "
+              f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+              f"{result['queries']:>8} {result['response_bytes']:>9}")
+
+    output = args.output or os.path.join('benchmark_results', f'endpoints-{git_commit()}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': git_commit(), 'created_at': datetime.utcnow().isoformat(),
+            'database': args.database_url.split('@')[-1], 'dataset': counts,
+            'iterations': args.iterations, 'cache': args.cache, 'results': results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = {(r['group'], r['name']): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+    print(f"{'endpoint':<32} {'p50 old':>9} {'p50 new':>9} {'change':>8} {'queries':>10}")
+    for result in new:
+        before = old.get((result['group'], result['name']))
+        if before is None:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+        print(f"{result['group'] + '.' + result['name']:<32} {before['p50_ms']:>9.2f} {result['p50_ms']:>9.2f} "
+              f"{change:>+7.1f}% {before['queries']:>4} -> {result['queries']:<4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BioSearch endpoints')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'sqlite:////tmp/biosearch_bench.db'))
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--cache', action='store_true', help='keep the response cache enabled')
+    parser.add_argument('--only', nargs='*', help='endpoint names to run')
+    parser.add_argument('--output', help='results file (default benchmark_results/endpoints-<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files')
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
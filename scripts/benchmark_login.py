@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark password hashing cost and login throughput.
+
+First times a single scrypt verification for a range of cost settings
+(n = 2^13 .. 2^17), then runs concurrent logins through the test client
+at the configured PASSWORD_SCRYPT_N/R/P and PASSWORD_HASH_WORKERS and
+reports logins per second, latency percentiles and how many logins were
+turned away with 503 because the hash pool was saturated.
+
+Usage:
+  python scripts/generate_synthetic_data.py --database-url sqlite:////tmp/biosearch_bench.db
+  PASSWORD_HASH_WORKERS=4 python scripts/benchmark_login.py --database-url sqlite:////tmp/biosearch_bench.db \\
+      --concurrency 1 4 16
+"""
+
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_endpoints import percentile
+from generate_synthetic_data import BENCH_PASSWORD, MANAGER_EMAIL
+
+
+def time_costs(repeat):
+    print(f"{'n':>8} {'r':>3} {'p':>3} {'MiB':>6} {'ms/verify':>10}")
+    for exponent in range(13, 18):
+        n = 2 ** exponent
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hashlib.scrypt(BENCH_PASSWORD.encode(), salt=b'0' * 16, n=n, r=8, p=1,
+                           maxmem=128 * n * 8 + 2 ** 20, dklen=32)
+            timings.append(time.perf_counter() - started)
+        print(f"{n:>8} {8:>3} {1:>3} {128 * n * 8 / 2 ** 20:>6.0f} {statistics.median(timings) * 1000:>10.1f}")
+
+
+def run_logins(client, concurrency, seconds):
+    lock = threading.Lock()
+    timings, statuses = [], defaultdict(int)
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.post('/api/auth/login', json={'email': MANAGER_EMAIL, 'password': BENCH_PASSWORD})
+            elapsed = time.perf_counter() - started
+            with lock:
+                timings.append(elapsed * 1000)
+                statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'concurrency': concurrency,
+        'logins_per_second': round(statuses[200] / elapsed, 1),
+        'p50_ms': round(percentile(timings, 0.50), 1),
+        'p95_ms': round(percentile(timings, 0.95), 1),
+        'p99_ms': round(percentile(timings, 0.99), 1),
+        'statuses': dict(statuses),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark password hashing and login throughput')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'sqlite:////tmp/biosearch_bench.db'))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--repeat', type=int, default=5, help='verifications per cost setting')
+    parser.add_argument('--skip-costs', action='store_true', help='only measure login throughput')
+    args = parser.parse_args()
+
+    if not args.skip_costs:
+        time_costs(args.repeat)
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+    import app as backend
+    import passwords
+
+    client = backend.app.test_client()
+    # The first login upgrades a legacy or outdated hash, keep it out of the numbers
+    client.post('/api/auth/login', json={'email': MANAGER_EMAIL, 'password': BENCH_PASSWORD})
+
+    print(f"\nLogin throughput at n={passwords.SCRYPT_N} r={passwords.SCRYPT_R} p={passwords.SCRYPT_P}, "
+          f"{passwords._workers} hash workers")
+    print(f"{'threads':>8} {'logins/s':>9} {'p50':>8} {'p95':>8} {'p99':>8}  statuses")
+    for concurrency in args.concurrency:
+        result = run_logins(client, concurrency, args.seconds)
+        print(f"{concurrency:>8} {result['logins_per_second']:>9} {result['p50_ms']:>8} "
+              f"{result['p95_ms']:>8} {result['p99_ms']:>8}  {result['statuses']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic BioSearch dataset at a configurable scale.
+
+Creates the schema from the current models and fills it with salons,
+images, services, opening hours, reviews, bookings and users using bulk
+inserts, so benchmark and load-test runs have realistic volumes without
+real customer data. Generation is deterministic for a given --seed.
+
+Known accounts (password "bench-password"):
+  bench-admin@example.com      admin
+  bench-manager@example.com    owns the first --manager-salons salons
+
+Usage:
+  python scripts/generate_synthetic_data.py --database-url sqlite:////tmp/biosearch_bench.db \\
+      --salons 10000 --bookings 1000000 --reviews 500000 --images-per-salon 3
+"""
+
+import argparse
+import os
+import random
+import secrets
+import sys
+import time as timer
+from datetime import date, datetime, time, timedelta
+
+BENCH_PASSWORD = 'bench-password'
+ADMIN_EMAIL = 'bench-admin@example.com'
+MANAGER_EMAIL = 'bench-manager@example.com'
+
+CITIES = {
+    'Lisboa': (38.7223, -9.1393), 'Porto': (41.1579, -8.6291), 'Braga': (41.5454, -8.4265),
+    'Coimbra': (40.2033, -8.4103), 'Faro': (37.0194, -7.9322), 'Aveiro': (40.6405, -8.6538),
+    'Setúbal': (38.5244, -8.8882), 'Viseu': (40.6566, -7.9125), 'Leiria': (39.7436, -8.8071),
+    'Évora': (38.5714, -7.9135), 'Funchal': (32.6669, -16.9241), 'Guimarães': (41.4425, -8.2918),
+}
+
+SERVICES = [
+    ("Basic Manicure", "Manicure", "Traditional nail care with shaping, cuticle care, and polish", False),
+    ("Deluxe Manicure", "Manicure", "Extended nail care with hand massage and premium polish", False),
+    ("French Manicure", "Manicure", "Classic French tip manicure", False),
+    ("Gel Polish Manicure", "Manicure", "Long-lasting gel polish application", False),
+    ("Basic Pedicure", "Pedicure", "Foot care with nail shaping and polish", False),
+    ("Deluxe Pedicure", "Pedicure", "Complete foot treatment with massage and exfoliation", False),
+    ("Nail Art", "Art", "Custom nail art designs", False),
+    ("Nail Extensions", "Extensions", "Acrylic or gel nail extensions", False),
+    ("BIO Diamond Manicure", "BIO Diamond", "Professional BIO Sculpture gel manicure system", True),
+    ("BIO Diamond Pedicure", "BIO Diamond", "Professional BIO Sculpture gel pedicure system", True),
+    ("BIO Diamond French", "BIO Diamond", "French manicure using BIO Sculpture gel system", True),
+    ("BIO Diamond Gel Overlay", "BIO Diamond", "Natural nail strengthening with BIO gel", True),
+    ("BIO Diamond Extensions", "BIO Diamond", "Nail extensions with BIO Sculpture gel system", True),
+    ("BIO Diamond Art", "BIO Diamond", "Artistic designs with BIO Sculpture products", True),
+    ("BIO Diamond Repair", "BIO Diamond", "Nail repair using BIO Sculpture gel technology", True),
+]
+
+WORDS = ['unhas', 'manicure', 'pedicure', 'gel', 'BIO', 'cuidado', 'beleza', 'tratamento',
+         'profissional', 'conforto', 'qualidade', 'equipa', 'experiência', 'relaxante']
+NAME_PARTS = ['Beleza', 'Unhas', 'Glamour', 'Estilo', 'Charme', 'Essência', 'Brilho', 'Bio', 'Diamante']
+FIRST_NAMES = ['Ana', 'Maria', 'Joana', 'Sofia', 'Inês', 'Beatriz', 'Marta', 'Rita', 'Carla', 'Teresa']
+LAST_NAMES = ['Silva', 'Santos', 'Ferreira', 'Pereira', 'Oliveira', 'Costa', 'Rodrigues', 'Martins']
+
+# Half-hour booking slots between 09:00 and 18:00
+SLOT_TIMES = [time(9 + minutes // 60, minutes % 60) for minutes in range(0, 9 * 60, 30)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic BioSearch dataset')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'sqlite:////tmp/biosearch_bench.db'))
+    parser.add_argument('--salons', type=int, default=10000)
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--reviews', type=int, default=500000)
+    parser.add_argument('--images-per-salon', type=int, default=3)
+    parser.add_argument('--users', type=int, default=1000, help='additional manager accounts')
+    parser.add_argument('--manager-salons', type=int, default=5)
+    parser.add_argument('--booking-days', type=int, default=365, help='days around today bookings spread over')
+    parser.add_argument('--chunk-size', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='drop existing tables first')
+    return parser.parse_args(argv)
+
+
+def load_app(database_url):
+    """Import the backend against ``database_url``"""
+    os.environ['DATABASE_URL'] = database_url
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+    import app as backend
+    return backend
+
+
+def insert_chunks(backend, table, rows, chunk_size):
+    """Bulk insert an iterable of row dicts in chunks, returns the row count"""
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            backend.db.session.execute(table.insert(), chunk)
+            backend.db.session.commit()
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        backend.db.session.execute(table.insert(), chunk)
+        backend.db.session.commit()
+        total += len(chunk)
+    return total
+
+
+def generate(args):
+    backend = load_app(args.database_url)
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = date.today()
+
+    with backend.app.app_context():
+        db = backend.db
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        if db.session.query(backend.Salon.id).first() is not None:
+            print("Database already contains salons, use --reset to regenerate")
+            return
+        tables = db.metadata.tables
+        started = timer.perf_counter()
+
+        password_hash = backend.hash_password(BENCH_PASSWORD)
+        users = [
+            {'email': ADMIN_EMAIL, 'name': 'Bench Admin', 'password_hash': password_hash,
+             'auth_token': secrets.token_hex(32), 'is_admin': True, 'is_active': True, 'created_at': now},
+            {'email': MANAGER_EMAIL, 'name': 'Bench Manager', 'password_hash': password_hash,
+             'auth_token': secrets.token_hex(32), 'customer_id': 'BENCH-1', 'is_admin': False,
+             'is_active': True, 'created_at': now},
+        ]
+        # Extra managers share the hash, only the two known accounts are meant to log in
+        users += [
+            {'email': f'manager{index}@example.com', 'name': f'Manager {index}',
+             'password_hash': password_hash, 'auth_token': secrets.token_hex(32),
+             'customer_id': f'BENCH-{index}', 'is_admin': False, 'is_active': True, 'created_at': now}
+            for index in range(2, args.users + 2)
+        ]
+        insert_chunks(backend, tables['users'], users, args.chunk_size)
+        manager_id = db.session.query(backend.User.id).filter_by(email=MANAGER_EMAIL).scalar()
+        user_ids = [user_id for (user_id,) in db.session.query(backend.User.id).filter(
+            backend.User.is_admin == False).all()]
+
+        insert_chunks(backend, tables['services'], (
+            {'name': name, 'category': category, 'description': description, 'is_bio_diamond': bio}
+            for name, category, description, bio in SERVICES
+        ), args.chunk_size)
+        services = db.session.query(backend.Service.id, backend.Service.category).all()
+
+        def salons():
+            for index in range(args.salons):
+                cidade = rng.choice(list(CITIES))
+                lat, lon = CITIES[cidade]
+                yield {
+                    'codigo': f'S{index:07d}',
+                    'nome': f'Salão {rng.choice(NAME_PARTS)} {rng.choice(NAME_PARTS)} {index}',
+                    'pais': 'Portugal', 'estado': 'Ativo' if rng.random() < 0.95 else 'Inativo',
+                    'telefone': f'+351 2{rng.randint(10000000, 99999999)}',
+                    'email': f'salao{index}@example.pt', 'website': f'www.salao{index}.pt',
+                    'pais_morada': 'Portugal', 'regiao': cidade, 'cidade': cidade,
+                    'rua': f'Rua {rng.choice(LAST_NAMES)}', 'porta': str(rng.randint(1, 300)),
+                    'cod_postal': f'{rng.randint(1000, 9999)}-{rng.randint(100, 999)}',
+                    'latitude': lat + rng.uniform(-0.1, 0.1), 'longitude': lon + rng.uniform(-0.1, 0.1),
+                    'created_at': now, 'updated_at': now,
+                    'owner_id': manager_id if index < args.manager_salons else (
+                        rng.choice(user_ids) if rng.random() < 0.3 else None),
+                    'booking_enabled': index < args.manager_salons or rng.random() < 0.6,
+                    'is_active': True, 'is_bio_diamond': rng.random() < 0.3,
+                    'about': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 150))).capitalize(),
+                }
+        count = insert_chunks(backend, tables['salons'], salons(), args.chunk_size)
+        salon_ids = [salon_id for (salon_id,) in db.session.query(backend.Salon.id).order_by(backend.Salon.id).all()]
+        print(f"Created {count} salons")
+
+        def images():
+            for salon_id in salon_ids:
+                for order in range(rng.randint(0, args.images_per_salon * 2) if args.images_per_salon else 0):
+                    yield {'salon_id': salon_id, 'image_url': f'https://images.example.com/{salon_id}/{order}.jpg',
+                           'image_alt': f'Salão {salon_id}', 'is_primary': order == 0,
+                           'display_order': order, 'created_at': now}
+        print(f"Created {insert_chunks(backend, tables['salon_images'], images(), args.chunk_size)} images")
+
+        salon_durations = {}
+
+        def salon_services():
+            for salon_id in salon_ids:
+                for service_id, category in rng.sample(services, rng.randint(3, 8)):
+                    duration = rng.choice((30, 45, 60, 90, 120))
+                    salon_durations.setdefault(salon_id, []).append((service_id, duration))
+                    yield {'salon_id': salon_id, 'service_id': service_id,
+                           'price': round(rng.uniform(20, 95), 2), 'duration': duration}
+        print(f"Created {insert_chunks(backend, tables['salon_services'], salon_services(), args.chunk_size)} salon services")
+
+        def time_slots():
+            for salon_id in salon_ids:
+                for day in range(5):
+                    yield {'salon_id': salon_id, 'day_of_week': day, 'start_time': time(9, 0),
+                           'end_time': time(18, 0), 'is_available': True}
+                yield {'salon_id': salon_id, 'day_of_week': 5, 'start_time': time(10, 0),
+                       'end_time': time(16, 0), 'is_available': True}
+        print(f"Created {insert_chunks(backend, tables['time_slots'], time_slots(), args.chunk_size)} time slots")
+
+        def reviews():
+            for _ in range(args.reviews):
+                yield {'salon_id': rng.choice(salon_ids),
+                       'customer_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                       'customer_email': f'cliente{rng.randint(1, 10 ** 6)}@example.com',
+                       'rating': rng.choices((1, 2, 3, 4, 5), weights=(1, 1, 3, 8, 10))[0],
+                       'title': 'Excelente serviço', 'comment': ' '.join(rng.choice(WORDS) for _ in range(25)),
+                       'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 730)),
+                       'is_verified': rng.random() < 0.5}
+        print(f"Created {insert_chunks(backend, tables['reviews'], reviews(), args.chunk_size)} reviews")
+        # Bulk inserts bypass the flush hook maintaining the salon review summaries
+        backend.refresh_review_summaries()
+        db.session.commit()
+
+        def bookings():
+            # Spread bookings over distinct (day, slot) cells per salon so the
+            # data never contains double-booked slots
+            cells_per_salon = args.booking_days * len(SLOT_TIMES)
+            per_salon, remainder = divmod(args.bookings, len(salon_ids))
+            first_day = today - timedelta(days=args.booking_days // 2)
+            for position, salon_id in enumerate(salon_ids):
+                wanted = min(per_salon + (1 if position < remainder else 0), cells_per_salon)
+                for cell in rng.sample(range(cells_per_salon), wanted):
+                    day, slot = divmod(cell, len(SLOT_TIMES))
+                    booking_date = first_day + timedelta(days=day)
+                    service_id, _ = rng.choice(salon_durations[salon_id])
+                    yield {'salon_id': salon_id, 'service_id': service_id,
+                           'customer_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                           'customer_email': f'cliente{rng.randint(1, 10 ** 6)}@example.com',
+                           'customer_phone': f'+351 9{rng.randint(10000000, 99999999)}',
+                           'booking_date': booking_date, 'booking_time': SLOT_TIMES[slot], 'duration': 30,
+                           'status': 'completed' if booking_date < today else rng.choice(('pending', 'confirmed')),
+                           'created_at': now}
+        print(f"Created {insert_chunks(backend, tables['bookings'], bookings(), args.chunk_size)} bookings")
+
+        print(f"Dataset generated in {timer.perf_counter() - started:.1f}s at {args.database_url}")
+
+
+if __name__ == '__main__':
+    generate(parse_args())
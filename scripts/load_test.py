@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Load test the customer booking flow against a local gunicorn.
+
+Each virtual customer repeats the journey browse salons -> view salon ->
+check availability -> book, against a small set of "hot" salons so that
+customers compete for the same slots. Concurrency is ramped through
+--stages and every stage reports throughput, p50/p95/p99 per step and how
+many booking attempts ended in a "Time slot already booked" conflict.
+After the run the database is checked for slots that were booked twice.
+
+Runs offline against a dataset from generate_synthetic_data.py:
+  python scripts/generate_synthetic_data.py --database-url sqlite:////tmp/biosearch_bench.db
+  python scripts/load_test.py --database-url sqlite:////tmp/biosearch_bench.db --stages 1 5 10 25
+
+Pass --base-url to target a server that is already running instead of
+starting gunicorn.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_endpoints import git_commit, percentile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+STEPS = ('browse', 'view', 'availability', 'book')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the booking flow')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'sqlite:////tmp/biosearch_bench.db'))
+    parser.add_argument('--base-url', help='target a running server instead of starting gunicorn')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--stages', type=int, nargs='+', default=[1, 5, 10, 25, 50],
+                        help='concurrent customers per stage')
+    parser.add_argument('--stage-seconds', type=float, default=30)
+    parser.add_argument('--hot-salons', type=int, default=20, help='salons the customers compete for')
+    parser.add_argument('--days', type=int, default=14, help='booking dates are spread over the next N days')
+    parser.add_argument('--think-ms', type=int, default=0, help='pause between steps of a journey')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='results file (default benchmark_results/load-<commit>.json)')
+    return parser.parse_args(argv)
+
+
+def load_targets(engine, limit):
+    """Return [(salon_id, [service_id, ...])] for bookable salons"""
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT s.id, ss.service_id FROM salons s "
+            "JOIN salon_services ss ON ss.salon_id = s.id "
+            "WHERE s.booking_enabled = :enabled AND s.is_active = :enabled AND s.estado = 'Ativo' "
+            "AND s.id IN (SELECT id FROM salons WHERE booking_enabled = :enabled AND is_active = :enabled "
+            "AND estado = 'Ativo' ORDER BY id LIMIT :limit) "
+            "ORDER BY s.id, ss.service_id"
+        ), {'enabled': True, 'limit': limit}).all()
+    targets = defaultdict(list)
+    for salon_id, service_id in rows:
+        targets[salon_id].append(service_id)
+    return sorted(targets.items())
+
+
+def count_double_bookings(engine, salon_ids):
+    """Active slots held by more than one booking in the tested salons"""
+    if not salon_ids:
+        return 0
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT COUNT(*) FROM (SELECT salon_id, booking_date, booking_time FROM bookings "
+            "WHERE status IN ('pending', 'confirmed') AND salon_id IN ({}) "
+            "GROUP BY salon_id, booking_date, booking_time HAVING COUNT(*) > 1) duplicates".format(
+                ','.join(str(int(salon_id)) for salon_id in salon_ids))
+        )).scalar()
+
+
+def start_gunicorn(args):
+    # Every simulated customer shares one IP, per-client limits would dominate
+    env = dict(os.environ, DATABASE_URL=args.database_url, RATE_LIMIT_ENABLED='false')
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', '--chdir', BACKEND_DIR,
+        '--bind', f'127.0.0.1:{args.port}', '--workers', str(args.workers),
+        '--threads', str(args.threads), '--log-level', 'warning', 'app:app'
+    ], env=env)
+    base_url = f'http://127.0.0.1:{args.port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {process.returncode}")
+        try:
+            urllib.request.urlopen(f'{base_url}/api/health', timeout=1).read()
+            return process, base_url
+        except OSError:
+            time.sleep(0.25)
+    process.terminate()
+    raise SystemExit("gunicorn did not become ready within 30s")
+
+
+def call(base_url, method, path, body=None):
+    """Issue one request, returns (status, parsed JSON or None, seconds)"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'} if data else {})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            status, payload = response.status, response.read()
+    except urllib.error.HTTPError as e:
+        status, payload = e.code, e.read()
+    except OSError:
+        return 0, None, time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+    try:
+        return status, json.loads(payload), elapsed
+    except ValueError:
+        return status, None, elapsed
+
+
+class Recorder:
+    """Thread-safe collection of step timings and booking outcomes for one stage"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.outcomes = defaultdict(int)
+        self.journeys = 0
+
+    def step(self, name, status, seconds):
+        with self.lock:
+            self.timings[name].append(seconds * 1000)
+            self.statuses[name][status] += 1
+
+    def outcome(self, name):
+        with self.lock:
+            self.outcomes[name] += 1
+
+    def journey(self):
+        with self.lock:
+            self.journeys += 1
+
+    def summary(self, concurrency, seconds):
+        requests_total = sum(len(values) for values in self.timings.values())
+        attempts = self.outcomes['booked'] + self.outcomes['conflict'] + self.outcomes['rejected']
+        steps = {}
+        for name in STEPS:
+            values = sorted(self.timings[name])
+            if not values:
+                continue
+            steps[name] = {
+                'requests': len(values),
+                'p50_ms': round(percentile(values, 0.50), 2),
+                'p95_ms': round(percentile(values, 0.95), 2),
+                'p99_ms': round(percentile(values, 0.99), 2),
+                'mean_ms': round(statistics.fmean(values), 2),
+                'errors': sum(count for status, count in self.statuses[name].items()
+                              if status == 0 or status >= 500),
+                'statuses': {str(status): count for status, count in sorted(self.statuses[name].items())},
+            }
+        return {
+            'concurrency': concurrency,
+            'seconds': round(seconds, 2),
+            'journeys': self.journeys,
+            'requests': requests_total,
+            'requests_per_second': round(requests_total / seconds, 1) if seconds else None,
+            'bookings_per_second': round(self.outcomes['booked'] / seconds, 2) if seconds else None,
+            'booking_attempts': attempts,
+            'booked': self.outcomes['booked'],
+            'conflicts': self.outcomes['conflict'],
+            'conflict_rate': round(self.outcomes['conflict'] / attempts, 4) if attempts else 0,
+            'sold_out': self.outcomes['sold_out'],
+            'steps': steps,
+        }
+
+
+def customer(base_url, targets, dates, recorder, stop, rng, think):
+    """One virtual customer repeating the booking journey until ``stop`` is set"""
+    def step(name, method, path, body=None):
+        status, payload, seconds = call(base_url, method, path, body)
+        recorder.step(name, status, seconds)
+        if think:
+            time.sleep(think)
+        return status, payload
+
+    while not stop.is_set():
+        salon_id, service_ids = rng.choice(targets)
+        service_id = rng.choice(service_ids)
+        booking_date = rng.choice(dates).isoformat()
+
+        step('browse', 'GET', f'/api/salons?page={rng.randint(1, 5)}')
+        if stop.is_set():
+            break
+        step('view', 'GET', f'/api/salons/{salon_id}')
+        if stop.is_set():
+            break
+        status, payload = step('availability', 'GET',
+                               f'/api/salons/{salon_id}/availability?date={booking_date}&service_id={service_id}')
+        slots = payload.get('available_slots', []) if status == 200 and payload else []
+        if not slots:
+            recorder.outcome('sold_out')
+            recorder.journey()
+            continue
+        if stop.is_set():
+            break
+        status, payload = step('book', 'POST', '/api/bookings', {
+            'salon_id': salon_id, 'service_id': service_id, 'customer_name': 'Load Test',
+            'customer_email': f'load{rng.randint(1, 10 ** 6)}@example.com',
+            'booking_date': booking_date, 'booking_time': rng.choice(slots)
+        })
+        if status == 201:
+            recorder.outcome('booked')
+        elif status == 400 and payload and 'already booked' in payload.get('error', ''):
+            recorder.outcome('conflict')
+        else:
+            recorder.outcome('rejected')
+        recorder.journey()
+
+
+def run_stage(base_url, targets, dates, concurrency, seconds, seed, think):
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=customer, daemon=True, args=(
+            base_url, targets, dates, recorder, stop, random.Random(seed * 1000 + index), think))
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(concurrency, time.perf_counter() - started)
+
+
+def print_stage(result):
+    print(f"\n{result['concurrency']} customers: {result['requests_per_second']} req/s, "
+          f"{result['bookings_per_second']} bookings/s, {result['booking_attempts']} attempts, "
+          f"{result['conflicts']} conflicts ({result['conflict_rate']:.1%}), {result['sold_out']} sold out")
+    print(f"  {'step':<14} {'requests':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for name, step in result['steps'].items():
+        print(f"  {name:<14} {step['requests']:>8} {step['p50_ms']:>9.2f} {step['p95_ms']:>9.2f} "
+              f"{step['p99_ms']:>9.2f} {step['errors']:>7}")
+
+
+def main():
+    args = parse_args()
+    engine = create_engine(args.database_url)
+    targets = load_targets(engine, args.hot_salons)
+    if not targets:
+        raise SystemExit("No bookable salons found, generate a dataset with generate_synthetic_data.py first")
+
+    # Future days only, generated salons are closed on Sundays
+    first_day = date.today() + timedelta(days=1)
+    dates = [first_day + timedelta(days=offset) for offset in range(args.days)
+             if (first_day + timedelta(days=offset)).weekday() != 6]
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_gunicorn(args)
+    print(f"Target {base_url}, {len(targets)} hot salons, {len(dates)} dates")
+
+    stages = []
+    try:
+        for index, concurrency in enumerate(args.stages):
+            result = run_stage(base_url, targets, dates, concurrency, args.stage_seconds,
+                               args.seed + index, args.think_ms / 1000)
+            stages.append(result)
+            print_stage(result)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    double_booked = count_double_bookings(engine, [salon_id for salon_id, _ in targets])
+    print(f"\nDouble-booked slots in tested salons: {double_booked}")
+
+    output = args.output or os.path.join('benchmark_results', f'load-{git_commit()}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': git_commit(), 'created_at': datetime.utcnow().isoformat(),
+            'database': args.database_url.split('@')[-1], 'target': base_url,
+            'workers': None if args.base_url else args.workers, 'hot_salons': len(targets),
+            'stage_seconds': args.stage_seconds, 'double_booked_slots': double_booked, 'stages': stages
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
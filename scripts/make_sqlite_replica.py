@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Copy a SQLite database to a second file to act as a read replica.
+
+Lets the DATABASE_READ_URL routing be exercised locally without Postgres:
+
+  python scripts/make_sqlite_replica.py ~/biosearch.db /tmp/biosearch_replica.db
+  DATABASE_READ_URL=sqlite:////tmp/biosearch_replica.db python backend/app.py
+
+Writes keep going to the primary file, so re-run the script to "replicate"
+them; until then the replica shows the lag a real replica could have.
+"""
+
+import argparse
+import sqlite3
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy a SQLite database to a replica file')
+    parser.add_argument('primary', help='path of the primary SQLite file')
+    parser.add_argument('replica', help='path of the replica SQLite file (overwritten)')
+    args = parser.parse_args()
+
+    source = sqlite3.connect(args.primary)
+    target = sqlite3.connect(args.replica)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+    print(f"Copied {args.primary} to {args.replica}")
+
+
+if __name__ == '__main__':
+    main()